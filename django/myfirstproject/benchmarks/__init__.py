@@ -0,0 +1,9 @@
+"""
+Benchmarks for the blog project.
+
+Each module is a script run from the project directory, for example:
+
+    python -m benchmarks.http_views --scales 1k,100k --out results.json
+
+They use their own SQLite files (see benchmarks/settings.py), never db.sqlite3.
+"""
@@ -0,0 +1,147 @@
+"""
+Sync vs async blog views under many concurrent slow clients (ASGI).
+
+For each mode a fresh process imports the project with BLOG_ASYNC_VIEWS set
+accordingly and drives the ASGI application in-process with --clients
+concurrent clients. Every client takes --client-delay seconds to send its
+request and to read each response chunk, like a phone on a slow network.
+We report throughput, latency percentiles and the peak number of threads
+the process needed.
+
+    python -m benchmarks.async_views --clients 200 --seconds 10 --client-delay 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks import common
+
+PATHS = ['/blog/posts/', '/blog/api/posts/']
+
+
+async def asgi_get(application, path, delay):
+    path_info, _, query_string = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path_info,
+        'raw_path': path_info.encode(),
+        'query_string': query_string.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80),
+    }
+    state = {'sent': False, 'status': None}
+
+    async def receive():
+        if not state['sent']:
+            state['sent'] = True
+            await asyncio.sleep(delay)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Django listens for a disconnect while the view runs; never send one
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            state['status'] = message['status']
+        elif message['type'] == 'http.response.body' and delay:
+            await asyncio.sleep(delay)
+
+    await application(scope, receive, send)
+    return state['status']
+
+
+async def drive(application, clients, seconds, delay, paths=None):
+    paths = paths or PATHS
+    latencies, statuses = [], {}
+    peak_threads = threading.active_count()
+    deadline = time.perf_counter() + seconds
+
+    async def client(number):
+        nonlocal peak_threads
+        index = number
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status = await asgi_get(application, paths[index % len(paths)], delay)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+            peak_threads = max(peak_threads, threading.active_count())
+            index += 1
+
+    await asyncio.gather(*(client(number) for number in range(clients)))
+    return {
+        'requests': len(latencies),
+        'requests_per_s': round(len(latencies) / seconds, 1),
+        'latency_ms': common.summarize(latencies),
+        'peak_threads': peak_threads,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def child(args):
+    """Runs inside the per-mode process; prints its results as JSON."""
+    common.setup_django()
+    from django.conf import settings
+    from django.core.asgi import get_asgi_application
+
+    common.use_database(args.scale)
+    # Measure the views, not the page cache
+    settings.BLOG_PAGE_CACHE = {**settings.BLOG_PAGE_CACHE, 'ENABLED': False}
+    application = get_asgi_application()
+    result = asyncio.run(drive(application, args.clients, args.seconds, args.client_delay))
+    result['async_views'] = settings.BLOG_ASYNC_VIEWS
+    print(json.dumps(result))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', default='10k', help=f"Posts to seed, one of {', '.join(common.SCALES)}")
+    parser.add_argument('--clients', type=int, default=200, help='Concurrent clients')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--client-delay', type=float, default=0.05, help='Seconds each client takes per network step')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help='Also write the JSON results here')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return child(args)
+
+    common.setup_django()
+    (name, posts), = common.parse_scales(args.scale)
+    common.use_database(name)
+    print(f"Seeding {name} ({posts} posts)...", file=sys.stderr)
+    common.seed_database(posts, seed=args.seed)
+
+    results = {
+        'environment': common.environment(),
+        'config': {'scale': name, 'clients': args.clients, 'seconds': args.seconds, 'client_delay': args.client_delay},
+        'modes': {},
+    }
+    for mode, flag in (('sync', '0'), ('async', '1')):
+        print(f"  {mode}", file=sys.stderr)
+        command = [
+            sys.executable, '-m', 'benchmarks.async_views', '--child', '--scale', name,
+            '--clients', str(args.clients), '--seconds', str(args.seconds),
+            '--client-delay', str(args.client_delay),
+        ]
+        output = subprocess.run(
+            command, env={**os.environ, 'BLOG_ASYNC_VIEWS': flag},
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results['modes'][mode] = json.loads(output.strip().splitlines()[-1])
+
+    common.write_results(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
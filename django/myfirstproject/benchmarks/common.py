@@ -0,0 +1,91 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1M': 1_000_000}
+
+
+def setup_django(settings_module='benchmarks.settings'):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def parse_scales(text):
+    try:
+        return [(name, SCALES[name]) for name in text.split(',') if name]
+    except KeyError as error:
+        raise SystemExit(f"Unknown scale {error}; choose from {', '.join(SCALES)}")
+
+
+def use_database(name):
+    """Point the default connection at the SQLite file for one scale."""
+    from django.conf import settings
+    from django.db import connection
+
+    path = os.path.join(settings.BENCH_DATA_DIR, f'bench-{name}.sqlite3')
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    return path
+
+
+def seed_database(posts, comments_per_post=5, users=100, seed=42, quiet=True):
+    """Migrate and fill the current database. Re-running with the same
+    arguments is cheap because populate_blog skips existing posts."""
+    from io import StringIO
+    from django.core.management import call_command
+
+    out = StringIO() if quiet else sys.stdout
+    call_command('migrate', verbosity=0, interactive=False)
+    call_command(
+        'populate_blog', posts=posts, comments_per_post=comments_per_post,
+        users=users, seed=seed, batch_size=5000, stdout=out,
+    )
+
+
+def summarize(samples):
+    """p50/p95/p99/mean of a list of numbers, rounded for stable JSON."""
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return {'p50': value, 'p95': value, 'p99': value, 'mean': value}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {
+        'p50': round(cuts[49], 4),
+        'p95': round(cuts[94], 4),
+        'p99': round(cuts[98], 4),
+        'mean': round(statistics.fmean(samples), 4),
+    }
+
+
+def environment():
+    """Where the numbers came from, so two result files can be compared."""
+    import django
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def write_results(results, out=None):
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if out:
+        with open(out, 'w') as file:
+            file.write(text + '\n')
+    print(text)
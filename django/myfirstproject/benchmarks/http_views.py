@@ -0,0 +1,231 @@
+"""
+HTTP benchmark for the blog views.
+
+Seeds a database per scale with populate_blog, then calls the WSGI
+application in-process (no sockets, no server) and reports latency
+percentiles, queries per request and memory allocated per request.
+
+    python -m benchmarks.http_views --scales 1k,100k --requests 200 --out bench.json
+    python -m benchmarks.http_views --compare old.json new.json
+
+Results are JSON with sorted keys so files from two commits diff cleanly.
+"""
+import argparse
+import io
+import json
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+
+from benchmarks import common
+
+
+class QueryCounter:
+    """Counts queries through connection.execute_wrapper().
+
+    CaptureQueriesContext can't be used here: the WSGI handler resets the
+    query log at the start of every request."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def wsgi_get(application, path, cookie=None):
+    path_info, _, query_string = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path_info,
+        'QUERY_STRING': query_string,
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'testserver',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if cookie:
+        environ['HTTP_COOKIE'] = cookie
+
+    status = []
+
+    def start_response(status_line, headers, exc_info=None):
+        status.append(int(status_line.split()[0]))
+
+    result = application(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return status[0], body
+
+
+@contextmanager
+def counting_queries():
+    from django.db import connections
+
+    counter = QueryCounter()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(counter))
+        yield counter
+
+
+def build_targets(rng):
+    """The URLs to measure for the database currently in use."""
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from blog.models import Post
+    from blog.pagination import KeysetPaginator
+
+    admin, _ = User.objects.get_or_create(
+        username='bench-admin', defaults={'is_staff': True, 'is_superuser': True},
+    )
+    client = Client()
+    client.force_login(admin)
+    admin_cookie = f"sessionid={client.cookies['sessionid'].value}"
+
+    total = Post.objects.count()
+    slugs = list(Post.objects.order_by('pk').values_list('slug', flat=True)[:500])
+    middle = Post.objects.order_by('-created_at', '-id')[total // 2]
+    deep_cursor = KeysetPaginator(Post.objects.all(), page_size=12).encode_cursor(middle, 'n')
+
+    return {
+        'post_list': lambda: ('/blog/posts/', None),
+        'post_list_deep': lambda: (f'/blog/posts/?cursor={deep_cursor}', None),
+        'post_detail': lambda: (f'/blog/posts/{rng.choice(slugs)}/', None),
+        'contact': lambda: ('/contact/', None),
+        'admin_changelist': lambda: ('/admin/blog/post/', admin_cookie),
+    }
+
+
+def measure(application, target, requests, warmup):
+    from blog.cache import fragment_stats
+
+    for _ in range(warmup):
+        wsgi_get(application, *target())
+
+    fragment_stats.reset()
+    latencies, queries, statuses = [], [], set()
+    for _ in range(requests):
+        path, cookie = target()
+        with counting_queries() as counter:
+            started = time.perf_counter()
+            status, _ = wsgi_get(application, path, cookie)
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(counter.count)
+        statuses.add(status)
+    fragments = fragment_stats.snapshot()
+
+    # Allocation tracing slows requests down, so it gets its own smaller pass
+    allocations = []
+    tracemalloc.start()
+    try:
+        for _ in range(max(requests // 10, 5)):
+            path, cookie = target()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            wsgi_get(application, path, cookie)
+            allocations.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'latency_ms': common.summarize(latencies),
+        'queries': {'min': min(queries), 'max': max(queries), 'mean': round(sum(queries) / len(queries), 2)},
+        'peak_alloc_kib': common.summarize(allocations),
+        'post_card_fragments': fragments,
+        'requests': requests,
+        'statuses': sorted(statuses),
+    }
+
+
+def run(args):
+    common.setup_django()
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+
+    if args.no_page_cache:
+        settings.BLOG_PAGE_CACHE = {**settings.BLOG_PAGE_CACHE, 'ENABLED': False}
+
+    application = get_wsgi_application()
+    results = {'environment': common.environment(), 'page_cache': not args.no_page_cache, 'scales': {}}
+
+    for name, posts in common.parse_scales(args.scales):
+        common.use_database(name)
+        print(f"Seeding {name} ({posts} posts)...", file=sys.stderr)
+        common.seed_database(posts, comments_per_post=args.comments_per_post, seed=args.seed)
+
+        rng = random.Random(args.seed)
+        targets = build_targets(rng)
+        views = {}
+        for view, target in targets.items():
+            if args.views and view not in args.views:
+                continue
+            print(f"  {view}", file=sys.stderr)
+            views[view] = measure(application, target, args.requests, args.warmup)
+        results['scales'][name] = {'posts': posts, 'views': views}
+
+    common.write_results(results, args.out)
+
+
+def compare(old_path, new_path, threshold):
+    """Print p50/p95 changes between two result files; exit 1 on regressions."""
+    with open(old_path) as file:
+        old = json.load(file)
+    with open(new_path) as file:
+        new = json.load(file)
+
+    regressions = 0
+    for scale, data in new['scales'].items():
+        for view, result in data['views'].items():
+            before = old.get('scales', {}).get(scale, {}).get('views', {}).get(view)
+            if not before:
+                continue
+            for stat in ('p50', 'p95'):
+                a, b = before['latency_ms'][stat], result['latency_ms'][stat]
+                change = (b - a) / a if a else 0.0
+                flag = ''
+                if change > threshold:
+                    flag = '  REGRESSION'
+                    regressions += 1
+                print(f"{scale:>5} {view:<18} {stat} {a:9.3f} -> {b:9.3f} ms ({change:+.1%}){flag}")
+            if result['queries']['max'] > before['queries']['max']:
+                print(f"{scale:>5} {view:<18} queries {before['queries']['max']} -> {result['queries']['max']}  REGRESSION")
+                regressions += 1
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='1k,100k', help=f"Comma separated, from {', '.join(common.SCALES)}")
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per view')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per view')
+    parser.add_argument('--comments-per-post', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--views', nargs='*', help='Only run these views')
+    parser.add_argument('--no-page-cache', action='store_true', help='Measure rendering rather than page cache hits')
+    parser.add_argument('--out', help='Also write the JSON results here')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two result files')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative slowdown counted as a regression')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Lookup cost of get_post_detail's post index as the store grows.
+
+Builds a PostIndex of synthetic posts at each scale and times lookups by id
+(the dict index) against the linear scan it replaced, plus a date-range
+query. Index lookups should stay flat from 1k to 1M posts; the scan grows
+with the store.
+
+    python -m benchmarks.post_index --scales 1k,10k,100k,1M
+"""
+import argparse
+import datetime
+import random
+import sys
+import time
+
+from benchmarks import common
+
+
+def make_posts(count):
+    start = datetime.date(2000, 1, 1)
+    return [
+        {
+            'id': number,
+            'title': f'Post {number}',
+            'published_date': (start + datetime.timedelta(minutes=number)).isoformat(),
+        }
+        for number in range(1, count + 1)
+    ]
+
+
+def per_call_ns(function, arguments):
+    started = time.perf_counter_ns()
+    for argument in arguments:
+        function(argument)
+    return round((time.perf_counter_ns() - started) / len(arguments), 1)
+
+
+def run_scale(count, lookups, scans, rng):
+    from blog.post_store import PostIndex, published_date
+
+    posts = make_posts(count)
+    started = time.perf_counter()
+    index = PostIndex(posts, published_date)
+    build_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    ids = [rng.randint(1, count) for _ in range(lookups)]
+    # The old lookup scans the list, so it gets far fewer rounds
+    scan_ids = ids[:scans]
+    days = [index.posts[rng.randrange(count)]['published_date'][:10] for _ in range(lookups)]
+    return {
+        'posts': count,
+        'build_ms': build_ms,
+        'index_lookup_ns': per_call_ns(index.get, ids),
+        'linear_scan_ns': per_call_ns(lambda post_id: next(post for post in posts if post['id'] == post_id), scan_ids),
+        'date_range_ns': per_call_ns(lambda day: index.between(day, f'{day}T00:59'), days),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='1k,10k,100k,1M', help=f"Comma separated, from {', '.join(common.SCALES)}")
+    parser.add_argument('--lookups', type=int, default=100_000, help='Index lookups timed per scale')
+    parser.add_argument('--scans', type=int, default=50, help='Linear scans timed per scale')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help='Also write the JSON results here')
+    args = parser.parse_args(argv)
+
+    common.setup_django()
+    rng = random.Random(args.seed)
+    results = {
+        'environment': common.environment(),
+        'config': {'lookups': args.lookups, 'scans': args.scans},
+        'scales': {},
+    }
+    for name, count in common.parse_scales(args.scales):
+        print(f"  {name}", file=sys.stderr)
+        results['scales'][name] = run_scale(count, args.lookups, args.scans, rng)
+
+    common.write_results(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
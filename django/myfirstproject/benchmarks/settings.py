@@ -0,0 +1,23 @@
+"""
+Settings for benchmark runs: the project settings with DEBUG off and a
+throwaway database, so numbers reflect production-like behaviour and the
+development db.sqlite3 is never touched.
+"""
+import os
+import tempfile
+
+from myfirstproject.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+BENCH_DATA_DIR = os.environ.get('BENCH_DATA_DIR', os.path.join(tempfile.gettempdir(), 'blog-bench'))
+os.makedirs(BENCH_DATA_DIR, exist_ok=True)
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],  # noqa: F405
+        'NAME': os.path.join(BENCH_DATA_DIR, 'bench.sqlite3'),
+    }
+}
+DATABASE_REPLICAS = []
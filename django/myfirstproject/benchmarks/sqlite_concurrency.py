@@ -0,0 +1,129 @@
+"""
+Concurrent read/write throughput of SQLite under two connection profiles.
+
+Several worker processes share one database file, the way web workers do,
+and mix post reads with comment writes for a fixed time. The 'default'
+profile is SQLite's stock configuration (rollback journal, synchronous=FULL,
+deferred transactions); 'tuned' is myfirstproject.sqlite.PRODUCTION_PRAGMAS.
+
+    python -m benchmarks.sqlite_concurrency --workers 8 --seconds 10 --write-ratio 0.2
+"""
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+
+from benchmarks import common
+
+PROFILES = {
+    'default': {
+        'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+        'transaction_mode': None,
+    },
+    'tuned': None,  # filled from PRODUCTION_PRAGMAS in the worker
+}
+
+
+def apply_profile(name):
+    from django.db import connection
+    from myfirstproject.sqlite import PRODUCTION_PRAGMAS, sqlite_options
+
+    profile = PROFILES[name] or {'pragmas': PRODUCTION_PRAGMAS, 'transaction_mode': 'IMMEDIATE'}
+    connection.close()
+    connection.settings_dict['OPTIONS'] = sqlite_options(profile['pragmas'], profile['transaction_mode'])
+
+
+def worker(db_name, profile, seconds, write_ratio, seed, results):
+    common.setup_django()
+    from django.db import OperationalError, transaction
+    from blog.models import Comment, Post
+
+    common.use_database(db_name)
+    apply_profile(profile)
+
+    rng = random.Random(seed)
+    max_pk = Post.objects.order_by('-pk').values_list('pk', flat=True).first()
+    counts = {'reads': 0, 'writes': 0, 'locked': 0}
+    deadline = time.perf_counter() + seconds
+
+    while time.perf_counter() < deadline:
+        pk = rng.randint(1, max_pk)
+        try:
+            if rng.random() < write_ratio:
+                with transaction.atomic():
+                    post = Post.objects.only('id').filter(pk__gte=pk).first()
+                    Comment.objects.create(post=post, name='Bench', email='bench@example.com', content='Load test')
+                counts['writes'] += 1
+            else:
+                list(Post.objects.for_list().filter(pk__gte=pk)[:12])
+                counts['reads'] += 1
+        except OperationalError:
+            counts['locked'] += 1
+
+    results.put(counts)
+
+
+def run_profile(db_name, profile, args):
+    from django.db import connection
+
+    # journal_mode is stored in the file; switch it once here rather than
+    # having every worker race to do it
+    apply_profile(profile)
+    connection.ensure_connection()
+    connection.close()
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(db_name, profile, args.seconds, args.write_ratio, args.seed + i, results))
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    totals = {'reads': 0, 'writes': 0, 'locked': 0}
+    for _ in processes:
+        for key, value in results.get().items():
+            totals[key] += value
+    for process in processes:
+        process.join()
+
+    return {
+        'reads_per_s': round(totals['reads'] / args.seconds, 1),
+        'writes_per_s': round(totals['writes'] / args.seconds, 1),
+        **totals,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', default='10k', help=f"Posts to seed, one of {', '.join(common.SCALES)}")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--profiles', default='default,tuned')
+    parser.add_argument('--out', help='Also write the JSON results here')
+    args = parser.parse_args(argv)
+
+    common.setup_django()
+    (name, posts), = common.parse_scales(args.scale)
+    db_name = f'concurrency-{name}'
+    common.use_database(db_name)
+    print(f"Seeding {name} ({posts} posts)...", file=sys.stderr)
+    common.seed_database(posts, seed=args.seed)
+
+    results = {
+        'environment': common.environment(),
+        'config': {'scale': name, 'workers': args.workers, 'seconds': args.seconds, 'write_ratio': args.write_ratio},
+        'profiles': {},
+    }
+    for profile in args.profiles.split(','):
+        print(f"  {profile}", file=sys.stderr)
+        results['profiles'][profile] = run_profile(db_name, profile, args)
+
+    common.write_results(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Category, Post,Comment
+from . import search
 # Register your models here.
 
 admin.site.register(Category)
@@ -11,9 +12,17 @@ admin.site.register(Comment)
 class PostAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
     list_display = ('title','author','published_date','status')
+    list_select_related = ('author',)
     list_filter = ('status','created_at','published_date','author')
     search_fields = ('title','content')
     raw_id_fields = ('author',)
     ordering = ['status','published_date']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the FTS5 index instead of LIKE '%term%' scans over title and content
+        match = search.build_match_query(search_term)
+        if not match or not search.is_available():
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=search.matching_ids_sql(match)), False
+
 admin.site.register(Post,PostAdmin)
@@ -1,6 +1,29 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+SEARCH_MIGRATION = ('blog', '0009_post_search_index')
+
+
+def install_search_triggers(sender, using, **kwargs):
+    from django.db import connections
+    from django.db.migrations.recorder import MigrationRecorder
+    from . import search
+
+    connection = connections[using]
+    # Only where 0009 made the index; after migrating back past it there is
+    # nothing to keep in step
+    if SEARCH_MIGRATION not in MigrationRecorder(connection).applied_migrations():
+        return
+    search.install_triggers(connection)
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        # SQLite rebuilds blog_post on some schema changes, which drops the
+        # full-text search triggers; put them back after every migrate.
+        post_migrate.connect(install_search_triggers, sender=self)
@@ -0,0 +1,110 @@
+"""
+Async versions of the read-only blog views.
+
+Under ASGI a sync view holds a worker thread for the whole request; these
+await the database through Django's async ORM instead. blog.urls picks
+them when settings.BLOG_ASYNC_VIEWS is on. Writes (the comment POST on
+post_detail) still go through the sync views.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.http import Http404, JsonResponse
+from django.shortcuts import aget_object_or_404, render
+
+from . import views
+from .cache import cached_page, cacheable_csrf, tag_page
+from .forms import CommentForm
+from .models import Post
+from .pagination import InvalidCursor, KeysetPaginator, get_page_size
+
+
+async def load_messages(request):
+    # Templates read flash messages, which may need a session query; load
+    # them here so rendering doesn't touch the database from the event loop
+    await sync_to_async(len)(messages.get_messages(request))
+
+
+@cached_page(views.post_list_cache_key)
+async def post_list(request):
+    await load_messages(request)
+    posts = Post.objects.for_list()
+    status = views.get_status_filter(request)
+    if status:
+        posts = posts.filter(status=status)
+
+    paginator = KeysetPaginator(posts, page_size=get_page_size(request))
+    try:
+        page = await paginator.apage(request.GET.get('cursor'))
+    except InvalidCursor:
+        raise Http404("Invalid page cursor.")
+
+    tag_page(request, 'post-list')
+    for post in page:
+        tag_page(request, f'post:{post.pk}', f'category:{post.category_id}' if post.category_id else None)
+
+    context = {
+        'posts': page.object_list,
+        'page': page,
+        'status': status,
+        'title': 'Blog Posts'
+    }
+    return render(request, 'posts/post_list.html', context)
+
+
+@cached_page(lambda request, slug: (slug,))
+async def post_detail(request, slug):
+    if request.method == 'POST':
+        return await sync_to_async(views.post_detail)(request, slug)
+
+    await load_messages(request)
+    post = await aget_object_or_404(Post.objects.for_detail(), slug=slug)
+    comments_page = await views.comment_paginator(post).apage()
+
+    tag_page(request, f'post:{post.pk}', f'category:{post.category_id}' if post.category_id else None)
+    context = {
+        'post': post,
+        'comments': comments_page.object_list,
+        'comments_page': comments_page,
+        'comment_form': CommentForm(),
+        **cacheable_csrf(request),
+    }
+    return render(request, 'posts/post_detail.html', context)
+
+
+@cached_page(views.post_list_cache_key)
+async def posts_api(request):
+    posts = Post.objects.for_list()
+    status = views.get_status_filter(request)
+    if status:
+        posts = posts.filter(status=status)
+
+    try:
+        page = await KeysetPaginator(posts, page_size=get_page_size(request)).apage(request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+    tag_page(request, 'post-list')
+    for post in page:
+        tag_page(request, f'post:{post.pk}', f'category:{post.category_id}' if post.category_id else None)
+
+    return JsonResponse({
+        'posts': [views.post_to_dict(post) for post in page],
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+    })
+
+
+@cached_page(views.post_comments_cache_key)
+async def post_comments(request, slug):
+    post = await aget_object_or_404(Post.objects.only('id'), slug=slug)
+    try:
+        page = await views.comment_paginator(post).apage(request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+    tag_page(request, f'post:{post.pk}')
+
+    return JsonResponse({
+        'comments': [views.comment_to_dict(comment) for comment in page],
+        'next_cursor': page.next_cursor,
+    })
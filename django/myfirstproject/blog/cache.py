@@ -0,0 +1,255 @@
+"""
+Page cache for the post list and detail views with tag-based invalidation.
+
+Each cached page remembers the version of every tag it depends on, e.g.
+'post:12' for a post shown on it or 'category:3' for a category name it
+prints. Signal handlers in blog.signals bump a tag's version when the rows
+behind it change, and a page whose tags have moved on is treated as a miss.
+So a new comment on post 12 evicts that post's detail page and the list
+pages showing its card, and nothing else.
+
+The tag versions double as the page's validators: they make up its ETag,
+and since they are timestamps the newest one is its Last-Modified. So a
+conditional GET for a page that is still cached gets its 304 without a
+query or a template render, and any change that invalidates one of the
+page's tags moves both.
+
+Tag versions live in the same cache as the pages. With the default
+per-process LocMemCache each worker keeps its own copy; point CACHES at
+Memcached or Redis to share pages and invalidations between workers.
+"""
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+PAGE_PREFIX = 'blog:page'
+TAG_PREFIX = 'blog:tag'
+
+# Rendered in place of the CSRF token so one cached page can serve every
+# visitor; swapped for the visitor's own token on the way out.
+CSRF_PLACEHOLDER = '__blog_page_cache_csrf__'
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+
+class CacheStats:
+    """Hit/miss counters for one kind of cached item, per process."""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def snapshot(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': round(self.hit_rate, 4)}
+
+
+# Post card fragments rendered by the {% post_card %} tag
+fragment_stats = CacheStats('post_card')
+
+
+def page_cache_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'BLOG_PAGE_CACHE', {})}
+
+
+def get_cache():
+    return caches[page_cache_settings()['ALIAS']]
+
+
+def _tag_key(tag):
+    return f'{TAG_PREFIX}:{tag}'
+
+
+def current_versions(tags, create=False):
+    """
+    Map each tag to its current version. Missing tags are created with a
+    fresh time-based version when `create` is set, otherwise left out, so a
+    tag evicted from the cache can never make an old page look fresh again.
+    """
+    cache = get_cache()
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    if create:
+        for key in keys.keys() - found.keys():
+            cache.add(key, time.time_ns(), timeout=None)
+        found.update(cache.get_many(keys.keys() - found.keys()))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def invalidate(*tags):
+    """
+    Move each tag to a new version, making every page that used it stale.
+
+    Versions are nanosecond timestamps, so the newest version among a
+    page's tags is also when anything on the page last changed; that is
+    the page's Last-Modified.
+    """
+    cache = get_cache()
+    found = cache.get_many([_tag_key(tag) for tag in tags])
+    # Tags not in the cache are left out: no stored page can be holding a
+    # valid version of them
+    if found:
+        now = time.time_ns()
+        cache.set_many({key: max(now, version + 1) for key, version in found.items()}, timeout=None)
+
+
+def tag_page(request, *tags):
+    """Record what the page being rendered depends on. No-op when not caching."""
+    page_tags = getattr(request, '_page_cache_tags', None)
+    if page_tags is not None:
+        page_tags.update(tag for tag in tags if tag)
+
+
+def cacheable_csrf(request):
+    """Context that renders a shareable CSRF placeholder while caching."""
+    if getattr(request, '_page_cache_tags', None) is not None:
+        return {'csrf_token': CSRF_PLACEHOLDER}
+    return {}
+
+
+def _make_etag(key, versions, content):
+    raw = '|'.join([key, *(f'{tag}={version}' for tag, version in sorted(versions.items()))])
+    digest = hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+    # Each visitor's copy carries their own CSRF token: equivalent, not identical
+    return f'W/"{digest}"' if CSRF_PLACEHOLDER.encode() in content else f'"{digest}"'
+
+
+def _set_validators(response, etag=None, last_modified=None):
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    # Let browsers keep the page but ask every time; asking is a 304 now
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def _build_response(request, content, content_type):
+    if CSRF_PLACEHOLDER.encode() in content:
+        content = content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+    return HttpResponse(content, content_type=content_type)
+
+
+def _page_key(view, key_func, request, args, kwargs):
+    raw_key = '|'.join(str(part) for part in key_func(request, *args, **kwargs))
+    return f'{PAGE_PREFIX}:{view.__name__}:{hashlib.md5(raw_key.encode()).hexdigest()}'
+
+
+def _cached_response(request, key):
+    entry = get_cache().get(key)
+    if entry is None or current_versions(entry['tags']) != entry['tags']:
+        return None
+    # A conditional GET for the page we hold needs no body at all
+    etag, last_modified = entry.get('etag'), entry.get('last_modified')
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _build_response(request, entry['content'], entry['content_type'])
+    response['X-Page-Cache'] = 'hit'
+    return _set_validators(response, etag, last_modified)
+
+
+def _store_response(request, key, response, tags):
+    if response.status_code != 200 or response.streaming or not tags:
+        return _set_validators(response)
+
+    # Tags are only known once the page is rendered, so a change that
+    # lands mid-render can survive until TIMEOUT; keep TIMEOUT short.
+    versions = current_versions(tags, create=True)
+    # HTTP dates have whole seconds: a change in the same second as the
+    # newest version keeps this date, which is why If-None-Match wins
+    last_modified = max(versions.values()) // 1_000_000_000
+    entry = {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'tags': versions,
+        'etag': _make_etag(key, versions, response.content),
+        'last_modified': last_modified,
+    }
+    get_cache().set(key, entry, page_cache_settings()['TIMEOUT'])
+    response = _build_response(request, entry['content'], entry['content_type'])
+    response['X-Page-Cache'] = 'miss'
+    return _set_validators(response, entry['etag'], last_modified)
+
+
+def _uncached_response(request, response):
+    # Not cached: ConditionalGetMiddleware still answers with a 304 from
+    # a hash of the body, after the render
+    return _set_validators(response)
+
+
+def cached_page(key_func):
+    """
+    Cache a view's GET and HEAD responses under key_func(request, *args, **kwargs).
+
+    Requests carrying flash messages bypass the cache in both directions,
+    since those pages differ per visitor. So do requests other than GET
+    and HEAD. Cached pages carry an ETag and a Last-Modified header, both
+    derived from their tag versions, and hits answer conditional requests
+    with a 304.
+    Works on both sync and async views.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                # Counting messages may load the session from the database
+                has_messages = await sync_to_async(len)(messages.get_messages(request))
+                if not page_cache_settings()['ENABLED'] or request.method not in ('GET', 'HEAD') or has_messages:
+                    return _uncached_response(request, await view(request, *args, **kwargs))
+
+                key = _page_key(view, key_func, request, args, kwargs)
+                response = _cached_response(request, key)
+                if response is not None:
+                    return response
+
+                request._page_cache_tags = set()
+                response = await view(request, *args, **kwargs)
+                return _store_response(request, key, response, request.__dict__.pop('_page_cache_tags'))
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not page_cache_settings()['ENABLED'] or request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+                return _uncached_response(request, view(request, *args, **kwargs))
+
+            key = _page_key(view, key_func, request, args, kwargs)
+            response = _cached_response(request, key)
+            if response is not None:
+                return response
+
+            request._page_cache_tags = set()
+            response = view(request, *args, **kwargs)
+            return _store_response(request, key, response, request.__dict__.pop('_page_cache_tags'))
+        return wrapper
+    return decorator
@@ -0,0 +1,69 @@
+"""
+Rejection of repeated and flooded comments.
+
+Every comment stores two fingerprints of its content (see Comment.save()):
+content_digest, a hash that ignores case and whitespace, and simhash, whose
+bits mostly survive small edits. CommentForm asks find_duplicate() before
+saving a comment, which checks two things through indexes alone, never
+reading comment bodies:
+
+- the same email's comments on the same post within WINDOW seconds
+  ((post, email, created_at) index), refused when one has the same digest
+  or a SimHash at most MAX_DISTANCE bits away;
+- copies of the exact text anywhere on the site within WINDOW
+  ((content_digest, created_at) index), refused once there are
+  FLOOD_LIMIT of them. Texts shorter than FLOOD_MIN_LENGTH ("Thanks!")
+  are left out of this one.
+
+Settings live in BLOG_COMMENT_DUPLICATES, see DEFAULT_SETTINGS.
+"""
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Comment, hamming_distance, make_comment_digest, make_simhash
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'WINDOW': 600,
+    'MAX_DISTANCE': 3,
+    # Recent comments by one email on one post compared against; a flooder
+    # has been stopped long before this many
+    'MAX_CANDIDATES': 50,
+    'FLOOD_LIMIT': 3,
+    'FLOOD_MIN_LENGTH': 20,
+}
+
+DUPLICATE_MESSAGE = 'You have already posted this comment.'
+FLOOD_MESSAGE = 'This comment has been posted too many times recently.'
+
+
+def duplicate_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'BLOG_COMMENT_DUPLICATES', {})}
+
+
+def find_duplicate(post, email, content):
+    """The reason to refuse this comment, or None if it is new."""
+    config = duplicate_settings()
+    if not config['ENABLED']:
+        return None
+
+    since = timezone.now() - datetime.timedelta(seconds=config['WINDOW'])
+    digest = make_comment_digest(content)
+    simhash = make_simhash(content)
+
+    recent = (
+        Comment.objects.filter(post=post, email=email, created_at__gte=since)
+        .order_by('-created_at')
+        .values_list('content_digest', 'simhash')[:config['MAX_CANDIDATES']]
+    )
+    for other_digest, other_simhash in recent:
+        if other_digest == digest or hamming_distance(simhash, other_simhash) <= config['MAX_DISTANCE']:
+            return DUPLICATE_MESSAGE
+
+    if config['FLOOD_LIMIT'] and len(' '.join(content.split())) >= config['FLOOD_MIN_LENGTH']:
+        copies = Comment.objects.filter(content_digest=digest, created_at__gte=since)[:config['FLOOD_LIMIT']]
+        if copies.count() >= config['FLOOD_LIMIT']:
+            return FLOOD_MESSAGE
+    return None
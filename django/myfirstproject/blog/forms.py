@@ -1,5 +1,6 @@
 from django import forms
 from .models import Post, Comment, Category
+from . import duplicates
 
 # Basic form - not tied to any model
 class ContactForm(forms.Form):
@@ -24,7 +25,7 @@ class PostForm(forms.ModelForm):
     """
     class Meta:
         model = Post
-        fields = ['title', 'slug', 'content', 'status', 'category', 'published_date', 'featured_image', 'thumbnail']
+        fields = ['title', 'slug', 'content', 'status', 'category', 'published_date', 'featured_image']
         widgets = {
             'title': forms.TextInput(attrs={'class': 'form-control'}),
             'slug': forms.TextInput(attrs={'class': 'form-control'}),
@@ -33,7 +34,6 @@ class PostForm(forms.ModelForm):
             'category': forms.Select(attrs={'class': 'form-control'}),
             'published_date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
             'featured_image': forms.FileInput(attrs={'class': 'form-control'}),
-            'thumbnail': forms.FileInput(attrs={'class': 'form-control'}),
         }
 
         help_texts = {
@@ -43,8 +43,7 @@ class PostForm(forms.ModelForm):
             'status': 'Select the status of the post',
             'category': 'Select the category of the post',
             'published_date': 'Enter the published date of the post. Leave empty for draft',
-            'featured_image': 'Upload a featured image for the post (recommended size: 1200x600)',
-            'thumbnail': 'Upload a thumbnail image for the post (recommended size: 400x200)',
+            'featured_image': 'Upload a featured image for the post (recommended size: 1200x600). The thumbnail is made from it.',
         }
         
 
@@ -74,6 +73,25 @@ class CommentForm(forms.ModelForm):
             'content': 'Enter your comment',
         }
 
+    def __init__(self, *args, post=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The post being commented on; without it, duplicates are not checked
+        self.post = post
+
+    def clean_email(self):
+        # Stored lowercased, like the rate limiter's email buckets, so the
+        # duplicate check sees Bob@x.com and bob@x.com as one commenter
+        return self.cleaned_data['email'].lower()
+
+    def clean(self):
+        cleaned_data = super().clean()
+        email, content = cleaned_data.get('email'), cleaned_data.get('content')
+        if self.post is not None and email and content:
+            reason = duplicates.find_duplicate(self.post, email, content)
+            if reason:
+                raise forms.ValidationError(reason)
+        return cleaned_data
+
 
 class CategoryForm(forms.ModelForm):
     """
@@ -0,0 +1,115 @@
+"""
+Image processing that runs in worker processes.
+
+Nothing here touches Django models or settings: the functions take plain
+paths and numbers so a ProcessPoolExecutor can pickle the call and run it in
+a freshly spawned interpreter.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+from PIL import Image, ImageOps, features
+
+
+def _write_atomically(target, data):
+    # Readers never see a half-written file: write next to the target, then rename
+    directory = os.path.dirname(target)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(descriptor, 'wb') as handle:
+            handle.write(data)
+        # mkstemp creates 0600 files; the web server must be able to read these
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, target)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def _encode(image, **save_options):
+    buffer = io.BytesIO()
+    image.save(buffer, **save_options)
+    return buffer.getvalue()
+
+
+def _load(source, draft_size=None):
+    with Image.open(source) as image:
+        if draft_size:
+            # draft() lets the JPEG decoder skip most of a large photo's
+            # pixels; square so it still covers the size if EXIF turns the
+            # photo sideways
+            longest = max(draft_size)
+            image.draft('RGB', (longest, longest))
+        # Photos from phones store their rotation in EXIF instead of the pixels
+        return ImageOps.exif_transpose(image).convert('RGB')
+
+
+def content_hash(path, chunk_size=1024 * 1024):
+    """BLAKE2b hex digest of a file's bytes, read in chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_thumbnail(source, target, size, quality=82):
+    """
+    Crop and scale the image at `source` to exactly `size` (width, height)
+    and write it to `target` as a progressive JPEG.
+    """
+    image = _load(source, draft_size=(size[0] * 2, size[1] * 2))
+    thumbnail = ImageOps.fit(image, tuple(size), Image.Resampling.LANCZOS)
+    _write_atomically(target, _encode(thumbnail, format='JPEG', quality=quality, optimize=True, progressive=True))
+    return target
+
+
+def render_variants(source, root, directory, widths, quality=82, webp_quality=80):
+    """
+    Write resized JPEG and WebP copies of `source` for each of `widths`
+    narrower than the image, plus one at its own width.
+
+    Variants live under `directory`/<content hash>/ in `root`, so identical
+    uploads share them and a manifest already on disk is returned as is.
+    Returns the manifest: the hash, the original size and, per width, the
+    storage names of its files.
+    """
+    digest = content_hash(source)
+    folder = f'{directory}/{digest[:2]}/{digest}'
+    manifest_path = os.path.join(root, folder, 'manifest.json')
+    try:
+        with open(manifest_path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        pass
+
+    image = _load(source)
+    width, height = image.size
+    sizes = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+    webp = features.check('webp')
+
+    variants = []
+    for target_width in sizes:
+        target_height = max(1, round(height * target_width / width))
+        resized = image.resize((target_width, target_height), Image.Resampling.LANCZOS)
+        entry = {'width': target_width, 'height': target_height, 'jpeg': f'{folder}/{target_width}.jpg'}
+        _write_atomically(
+            os.path.join(root, entry['jpeg']),
+            _encode(resized, format='JPEG', quality=quality, optimize=True, progressive=True),
+        )
+        if webp:
+            entry['webp'] = f'{folder}/{target_width}.webp'
+            _write_atomically(
+                os.path.join(root, entry['webp']),
+                _encode(resized, format='WEBP', quality=webp_quality, method=4),
+            )
+        variants.append(entry)
+
+    manifest = {'hash': digest, 'width': width, 'height': height, 'variants': variants}
+    # Written last: its presence means every variant is in place
+    _write_atomically(manifest_path, json.dumps(manifest).encode())
+    return manifest
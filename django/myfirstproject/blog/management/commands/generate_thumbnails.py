@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from blog import thumbnails, workers
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Generates missing or outdated post thumbnails from their featured images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Posts checked per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Count the thumbnails to make without making them')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        checked = queued = 0
+        last_pk = 0
+
+        try:
+            while True:
+                batch = list(
+                    Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                    .only('id', 'featured_image', 'thumbnail')[:batch_size]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+
+                for post in batch:
+                    if thumbnails.needs_thumbnail(post):
+                        queued += 1
+                        if not options['dry_run']:
+                            thumbnails.schedule(post)
+                checked += len(batch)
+        finally:
+            # Let the pool finish what was queued before the command exits
+            workers.shutdown(wait=True)
+
+        verb = 'Found' if options['dry_run'] else 'Processed'
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} posts. {verb} {queued} posts needing a thumbnail."))
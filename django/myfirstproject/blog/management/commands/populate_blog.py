@@ -1,31 +1,92 @@
 # Create a management command or script to populate your database with sample data
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from blog.models import Category, Post, Comment
+from django.db import transaction
+from blog.models import Category, Post, Comment, make_comment_digest, make_content_digest, make_simhash
 from django.utils import timezone
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
 import random
-from datetime import timedelta
+import time
+
+
+@contextmanager
+def auto_now_disabled(*models):
+    """
+    bulk_create() fills auto_now and auto_now_add fields with the current
+    time; switch that off so the generated posts and comments keep their
+    spread-out dates.
+    """
+    flags = [
+        (field, flag) for model in models for field in model._meta.concrete_fields
+        for flag in ('auto_now', 'auto_now_add') if getattr(field, flag, False)
+    ]
+    for field, flag in flags:
+        setattr(field, flag, False)
+    try:
+        yield
+    finally:
+        for field, flag in flags:
+            setattr(field, flag, True)
+
 
 class Command(BaseCommand):
     help = 'Populates the database with sample blog data'
-    
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=30, help='Number of posts to create')
+        parser.add_argument('--comments-per-post', type=int, default=10, help='Maximum comments per post')
+        parser.add_argument('--users', type=int, default=5, help='Number of users to create')
+        parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible data')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert / transaction')
+
     def handle(self, *args, **options):
-        # Create users
-        users = []
-        for i in range(5):
-            username = f"user{i+1}"
-            try:
-                user = User.objects.create_user(
-                    username=username,
-                    email=f"{username}@example.com",
-                    password="password123"
-                )
-                users.append(user)
-                self.stdout.write(f"Created user: {username}")
-            except:
-                users.append(User.objects.get(username=username))
-        
-        # Create categories
+        seed = options['seed']
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # Comments are only generated for posts that don't exist yet; giving them
+        # their own RNG keeps the post sequence identical on re-runs
+        self.comment_rng = random.Random(None if seed is None else seed + 1)
+        # Comment texts repeat from post to post; fingerprint each text once
+        self.fingerprints = {}
+        self.batch_size = options['batch_size']
+        # A seeded run should produce identical rows, dates included
+        if seed is None:
+            self.now = timezone.now()
+        else:
+            self.now = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+        user_ids = self.create_users(options['users'])
+        categories = self.create_categories()
+        self.create_posts(options['posts'], options['comments_per_post'], user_ids, categories)
+
+    def report(self, label, done, total, started):
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(f"{label}: {done}/{total} ({done / elapsed:,.0f} rows/s)")
+
+    def create_users(self, count):
+        # Hash the shared password once; create_user() would run PBKDF2 per user.
+        # A seeded run uses a fixed salt so the hash comes out the same too.
+        salt = None if self.seed is None else f"populateblog{self.seed}"
+        password = make_password("password123", salt=salt)
+        usernames = [f"user{i+1}" for i in range(count)]
+        started = time.perf_counter()
+
+        for start in range(0, count, self.batch_size):
+            chunk = usernames[start:start + self.batch_size]
+            existing = set(User.objects.filter(username__in=chunk).values_list('username', flat=True))
+            new_users = [
+                User(username=username, email=f"{username}@example.com", password=password, date_joined=self.now)
+                for username in chunk if username not in existing
+            ]
+            with transaction.atomic():
+                User.objects.bulk_create(new_users, batch_size=self.batch_size)
+            self.report("Users", start + len(chunk), count, started)
+
+        return list(User.objects.filter(username__in=usernames).values_list('id', flat=True))
+
+    def create_categories(self):
         categories = []
         category_data = [
             {"name": "Python", "slug": "python", "description": "All about Python programming"},
@@ -34,57 +95,101 @@ class Command(BaseCommand):
             {"name": "CSS", "slug": "css", "description": "Styling your web applications"},
             {"name": "Drafts", "slug": "drafts", "description": "Work in progress"}
         ]
-        
+
         for cat in category_data:
             category, created = Category.objects.get_or_create(**cat)
             categories.append(category)
             if created:
                 self.stdout.write(f"Created category: {category.name}")
-        
-        # Create posts
-        status_options = ['draft', 'published', 'archived']
-        post_count = 0
-        
-        for i in range(30):
-            user = random.choice(users)
-            category = random.choice(categories)
-            status = random.choice(status_options)
-            created_days_ago = random.randint(1, 365)
-            created_date = timezone.now() - timedelta(days=created_days_ago)
-            
-            published_date = None
-            if status == 'published':
-                published_days_ago = random.randint(0, created_days_ago)
-                published_date = timezone.now() - timedelta(days=published_days_ago)
-            
-            post, created = Post.objects.get_or_create(
-                title=f"Sample Post {i+1} about {category.name}",
-                slug=f"sample-post-{i+1}-about-{category.slug}",
-                defaults={
-                    'author': user,
-                    'category': category,
-                    'content': f"This is sample content for post {i+1} about {category.name}. " * 5,
-                    'status': status,
-                    'created_at': created_date,
-                    'published_date': published_date
-                }
-            )
-            
-            if created:
-                post.created_at = created_date
-                if published_date:
-                    post.published_date = published_date
-                post.save()
-                post_count += 1
-                
-                # Create comments for this post
-                comment_count = random.randint(0, 10)
-                for j in range(comment_count):
-                    Comment.objects.create(
-                        post=post,
-                        name=f"Commenter {j+1}",
-                        email=f"commenter{j+1}@example.com",
-                        content=f"This is comment {j+1} on this post. Great article!" * 2
+        return categories
+
+    def build_post(self, i, user_ids, categories):
+        rng = self.rng
+        category = rng.choice(categories)
+        status = rng.choice(['draft', 'published', 'archived'])
+        created_date = self.now - timedelta(days=rng.randint(1, 365), seconds=rng.randint(0, 86399))
+
+        published_date = None
+        if status == 'published':
+            published_date = created_date + (self.now - created_date) * rng.random()
+
+        title = f"Sample Post {i+1} about {category.name}"
+        content = f"This is sample content for post {i+1} about {category.name}. " * 5
+        return Post(
+            title=title,
+            slug=f"sample-post-{i+1}-about-{category.slug}",
+            author_id=rng.choice(user_ids) if user_ids else None,
+            category=category,
+            content=content,
+            # bulk_create() skips save(), so fill in what save() would
+            content_digest=make_content_digest(title, content),
+            status=status,
+            created_at=created_date,
+            updated_at=published_date or created_date,
+            published_date=published_date,
+        )
+
+    def build_comments(self, post, count):
+        comments = []
+        for j in range(count):
+            offset = (self.now - post.created_at) * self.comment_rng.random()
+            content = f"This is comment {j+1} on this post. Great article!" * 2
+            if content not in self.fingerprints:
+                self.fingerprints[content] = (make_comment_digest(content), make_simhash(content))
+            content_digest, simhash = self.fingerprints[content]
+            comments.append(Comment(
+                post_id=post.pk,
+                name=f"Commenter {j+1}",
+                email=f"commenter{j+1}@example.com",
+                content=content,
+                # bulk_create() skips save(), so fill in what save() would
+                content_digest=content_digest,
+                simhash=simhash,
+                created_at=post.created_at + offset,
+            ))
+        return comments
+
+    def create_posts(self, count, comments_per_post, user_ids, categories):
+        post_total = comment_total = 0
+        started = time.perf_counter()
+
+        with auto_now_disabled(Post, Comment):
+            for start in range(0, count, self.batch_size):
+                # Build the whole chunk first so the RNG sequence doesn't depend
+                # on which posts already exist
+                posts = [self.build_post(i, user_ids, categories) for i in range(start, min(start + self.batch_size, count))]
+                comment_counts = [self.rng.randint(0, comments_per_post) for _ in posts]
+
+                existing = set(
+                    Post.objects.filter(slug__in=[post.slug for post in posts]).values_list('slug', flat=True)
+                )
+                new_posts = []
+                for post, comment_count in zip(posts, comment_counts):
+                    if post.slug not in existing:
+                        # Comments are bulk inserted too, so the signals that
+                        # keep comment_count current never fire
+                        post.comment_count = comment_count
+                        new_posts.append(post)
+
+                with transaction.atomic():
+                    Post.objects.bulk_create(new_posts, batch_size=self.batch_size)
+                    # Not every backend returns primary keys from bulk_create
+                    ids = dict(
+                        Post.objects.filter(slug__in=[post.slug for post in new_posts]).values_list('slug', 'id')
                     )
-        
-        self.stdout.write(f"Created {post_count} new posts with comments")
\ No newline at end of file
+                    comments = []
+                    for post in new_posts:
+                        post.pk = ids[post.slug]
+                        comments.extend(self.build_comments(post, post.comment_count))
+                    Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+
+                post_total += len(new_posts)
+                comment_total += len(comments)
+                self.report("Posts", start + len(posts), count, started)
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        rows = post_total + comment_total
+        self.stdout.write(
+            f"Created {post_total} new posts with {comment_total} comments "
+            f"in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)"
+        )
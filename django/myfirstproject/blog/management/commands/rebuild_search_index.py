@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from blog import search
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the SQLite FTS5 full-text index for blog posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to rebuild')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not search.is_available(connection):
+            raise CommandError('Full-text search needs the SQLite backend.')
+
+        search.rebuild(connection)
+        count = Post.objects.using(options['database']).count()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search index for {count} posts"))
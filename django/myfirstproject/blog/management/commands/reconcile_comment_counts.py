@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Recounts comments and fixes Post.comment_count values that have drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Posts checked per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        checked = fixed = 0
+        last_pk = 0
+
+        # Walk posts in primary key order so each batch is an index range scan
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'comment_count')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            post_ids = [pk for pk, _ in batch]
+
+            actual = dict(
+                Comment.objects.filter(post_id__in=post_ids).order_by()
+                .values('post_id').annotate(total=Count('id'))
+                .values_list('post_id', 'total')
+            )
+            drifted = [
+                Post(pk=pk, comment_count=actual.get(pk, 0))
+                for pk, stored in batch if stored != actual.get(pk, 0)
+            ]
+
+            if drifted and not options['dry_run']:
+                with transaction.atomic():
+                    Post.objects.bulk_update(drifted, ['comment_count'])
+
+            checked += len(batch)
+            fixed += len(drifted)
+
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} posts. {verb} {fixed} drifted comment counts."))
@@ -0,0 +1,122 @@
+import os
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog import imaging, media_cleanup, variants
+
+
+class Command(BaseCommand):
+    help = 'Deletes files under MEDIA_ROOT that no file field refers to, and the image variants of files that are gone'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Files checked against the database per query')
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Leave files younger than this many seconds (uploads still being saved)',
+        )
+        parser.add_argument(
+            '--exclude', action='append', default=[],
+            help='Path prefix to leave alone; may be repeated',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report orphans without deleting them')
+
+    def walk(self, root, prefix=''):
+        """Yield (name, path, stat) for every file below `root`, one directory at a time."""
+        with os.scandir(root) as entries:
+            for entry in entries:
+                name = f'{prefix}{entry.name}'
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self.walk(entry.path, f'{name}/')
+                elif entry.is_file(follow_symlinks=False):
+                    yield name, entry.path, entry.stat(follow_symlinks=False)
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        self.orphans = self.reclaimed = 0
+        excluded = tuple(options['exclude'])
+        protected = media_cleanup.protected_names()
+        cutoff = time.time() - options['min_age']
+        variants_prefix = f"{variants.variant_settings()['DIRECTORY']}/"
+        # Files that stay, whose responsive variants must stay with them
+        self.kept_paths = []
+        # variants/<xx>/<content hash> -> its files
+        variant_folders = defaultdict(list)
+        scanned = 0
+        batch = []
+
+        for name, path, file_stat in self.walk(settings.MEDIA_ROOT):
+            scanned += 1
+            if name.startswith(excluded):
+                continue
+            if name.startswith(variants_prefix):
+                variant_folders[os.path.dirname(name)].append((name, path, file_stat))
+                continue
+            if name in protected or file_stat.st_mtime > cutoff:
+                self.kept_paths.append(path)
+                continue
+            batch.append((name, path, file_stat.st_size))
+            if len(batch) >= options['batch_size']:
+                self.sweep(batch)
+                batch = []
+        if batch:
+            self.sweep(batch)
+        if variant_folders:
+            self.sweep_variants(variant_folders, cutoff)
+
+        verb = 'Would reclaim' if self.dry_run else 'Reclaimed'
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} files. Found {self.orphans} orphans. "
+            f"{verb} {self.reclaimed} bytes ({self.reclaimed / 1024 / 1024:.1f} MB)."
+        ))
+
+    def sweep(self, batch):
+        referenced = media_cleanup.referenced_names(name for name, _, _ in batch)
+        for name, path, size in batch:
+            if name in referenced:
+                self.kept_paths.append(path)
+                continue
+            if self.verbosity >= 2:
+                self.stdout.write(f'  {name} ({size} bytes)')
+            self.remove(path, size)
+
+    def sweep_variants(self, folders, cutoff):
+        """
+        Variants are stored by the content hash of their original, not under
+        any field's name: delete the folders no kept file hashes to.
+        """
+        live = set()
+        for path in self.kept_paths:
+            try:
+                live.add(imaging.content_hash(path))
+            except OSError:
+                continue
+        for folder, files in folders.items():
+            if os.path.basename(folder) in live or any(file_stat.st_mtime > cutoff for _, _, file_stat in files):
+                continue
+            for name, path, file_stat in files:
+                if self.verbosity >= 2:
+                    self.stdout.write(f'  {name} ({file_stat.st_size} bytes)')
+                self.remove(path, file_stat.st_size)
+            if not self.dry_run:
+                self.remove_empty_dirs(os.path.join(settings.MEDIA_ROOT, folder))
+
+    def remove(self, path, size):
+        if not self.dry_run:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                return
+        self.orphans += 1
+        self.reclaimed += size
+
+    def remove_empty_dirs(self, path):
+        # The hash folder, then its two-letter parent if that is empty too
+        for directory in (path, os.path.dirname(path)):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
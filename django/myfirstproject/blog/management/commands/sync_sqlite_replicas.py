@@ -0,0 +1,33 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Copies the primary SQLite database into each replica file (stand-in replicas for testing)'
+
+    def handle(self, *args, **options):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if not replicas:
+            raise CommandError('No replicas configured; set BLOG_DB_REPLICAS.')
+
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('Only SQLite primaries can be copied this way.')
+
+        primary.ensure_connection()
+        for alias in replicas:
+            path = settings.DATABASES[alias]['NAME']
+            connections[alias].close()
+            started = time.perf_counter()
+            # The backup API copies a consistent snapshot even while the
+            # primary is being written to
+            target = sqlite3.connect(path)
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f"Copied primary to {alias} ({path}) in {time.perf_counter() - started:.2f}s")
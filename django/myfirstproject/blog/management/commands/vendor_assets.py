@@ -0,0 +1,79 @@
+import os
+import re
+import urllib.request
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myfirstproject.staticfiles import VENDOR_ASSETS
+
+CSS_URL_RE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+# Google Fonts picks the font format from the User-Agent; ask for woff2
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+
+class Command(BaseCommand):
+    help = 'Downloads the CDN assets used by layout.html into static/vendor/'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directory', default=os.path.join(settings.STATICFILES_DIRS[0], 'vendor'),
+            help='Where to write the files (default: static/vendor/)',
+        )
+        parser.add_argument('--timeout', type=int, default=30, help='Seconds to wait for each download')
+
+    def fetch(self, url):
+        request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except OSError as exc:
+            raise CommandError(f'Could not download {url}: {exc}')
+
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as handle:
+            handle.write(data)
+        self.written += len(data)
+        if self.verbosity >= 2:
+            self.stdout.write(f'  {name} ({len(data)} bytes)')
+
+    def localize_css(self, name, url, text):
+        """Download the fonts and images a stylesheet points at; point it at the copies."""
+        folder = os.path.dirname(name)
+        local = {}
+
+        def replace(match):
+            reference = match.group(2).strip()
+            if reference.startswith(('data:', '#')):
+                return match.group(0)
+            parts = urlsplit(urljoin(url, reference))
+            source = parts._replace(fragment='').geturl()
+            fragment = f'#{parts.fragment}' if parts.fragment else ''
+            # A stylesheet may name the same file several times
+            if source not in local:
+                local[source] = f'files/{os.path.basename(urlsplit(source).path)}'
+                self.write(os.path.join(folder, local[source]), self.fetch(source))
+            return f'url("{local[source]}{fragment}")'
+
+        return CSS_URL_RE.sub(replace, text)
+
+    def handle(self, *args, **options):
+        self.directory = options['directory']
+        self.timeout = options['timeout']
+        self.verbosity = options['verbosity']
+        self.written = 0
+
+        for name, url in VENDOR_ASSETS.items():
+            data = self.fetch(url)
+            if name.endswith('.css'):
+                data = self.localize_css(name, url, data.decode()).encode()
+            self.write(name, data)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Vendored {len(VENDOR_ASSETS)} assets ({self.written / 1024:.0f} KB) into {self.directory}. '
+            f'Set STATIC_VENDOR_ASSETS = True to use them.'
+        ))
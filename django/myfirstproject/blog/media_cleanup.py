@@ -0,0 +1,113 @@
+"""
+Removal of uploaded files that nothing points at any more.
+
+Deleting a post, or replacing its featured image, leaves files behind in
+MEDIA_ROOT. Rather than unlinking them inside the request, delete_later()
+queues them once the transaction commits and a background thread removes
+them. Before deleting, it checks that no row (of any model with a file
+field) still uses the name, and it never touches a field's default.
+
+The queue lives in memory, so a restart can drop queued work; the
+`sweep_media` command finds whatever was missed.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, connection, models, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    # Delete in the committing thread instead of the background one (tests)
+    'INLINE': False,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def cleanup_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'BLOG_MEDIA_CLEANUP', {})}
+
+
+def file_fields():
+    """(model, field) for every FileField/ImageField of every installed model."""
+    return [
+        (model, field)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+    ]
+
+
+def protected_names():
+    """Field defaults such as 'fallback.png', shared by many rows."""
+    return {field.default for _, field in file_fields() if isinstance(field.default, str) and field.default}
+
+
+def referenced_names(names):
+    """The subset of `names` still stored in some file field."""
+    names = list(names)
+    referenced = set()
+    for model, field in file_fields():
+        # Deciding to delete a file must not trust a lagging replica
+        referenced.update(
+            model._base_manager.using(DEFAULT_DB_ALIAS).filter(**{f'{field.name}__in': names})
+            .values_list(field.name, flat=True)
+        )
+    return referenced
+
+
+def delete_unreferenced(names, storage=default_storage):
+    """Delete those of `names` nothing refers to; return the bytes freed."""
+    names = set(filter(None, names)) - protected_names()
+    if not names:
+        return 0
+    freed = 0
+    for name in names - referenced_names(names):
+        try:
+            size = storage.size(name)
+            storage.delete(name)
+        except OSError:
+            # Already gone, or not ours to delete
+            continue
+        freed += size
+    return freed
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='media-cleanup')
+        return _executor
+
+
+def _delete_in_background(names):
+    try:
+        delete_unreferenced(names)
+    except Exception:
+        logger.exception('Could not delete media files %s', sorted(names))
+    finally:
+        connection.close()
+
+
+def _run(names):
+    if cleanup_settings()['INLINE']:
+        delete_unreferenced(names)
+    else:
+        _get_executor().submit(_delete_in_background, names)
+
+
+def delete_later(*names):
+    """Queue files for deletion once the current transaction commits."""
+    names = set(filter(None, names))
+    if names and cleanup_settings()['ENABLED']:
+        # A rolled back delete keeps its files
+        transaction.on_commit(partial(_run, names))
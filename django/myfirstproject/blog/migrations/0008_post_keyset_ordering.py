@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_alter_post_thumbnail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='post',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Post', 'verbose_name_plural': 'Posts'},
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-created_at', '-id'], name='blog_post_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# Frozen copies of the blog.search SQL as of this migration, so later
+# changes to that module cannot change what this migration does.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5(
+        title, content,
+        content='blog_post', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_ai AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_ad AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_au AFTER UPDATE OF title, content ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO blog_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')",
+    "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('optimize')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS blog_post_fts_ai',
+    'DROP TRIGGER IF EXISTS blog_post_fts_ad',
+    'DROP TRIGGER IF EXISTS blog_post_fts_au',
+    'DROP TABLE IF EXISTS blog_post_fts',
+]
+
+
+def execute(schema_editor, statements):
+    # FTS5 is SQLite only; other backends search with LIKE
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in statements:
+        schema_editor.execute(statement, params=None)
+
+
+def create_search_index(apps, schema_editor):
+    execute(schema_editor, CREATE_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    execute(schema_editor, DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_post_keyset_ordering'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,70 @@
+import hashlib
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# A frozen copy of blog.models.make_content_digest as of this migration, so
+# later changes to the model code cannot change what this backfill writes.
+def make_content_digest(title, content):
+    normalized_title = ' '.join((title or '').split()).casefold()
+    normalized_content = ' '.join((content or '').split()).casefold()
+    payload = f'{normalized_title}\x00{normalized_content}'.encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=32).hexdigest()
+
+
+def backfill_content_digest(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    db_alias = schema_editor.connection.alias
+    batch = []
+    posts = Post.objects.using(db_alias).only('id', 'title', 'content').order_by('pk')
+    for post in posts.iterator(chunk_size=2000):
+        post.content_digest = make_content_digest(post.title, post.content)
+        batch.append(post)
+        if len(batch) >= 2000:
+            Post.objects.using(db_alias).bulk_update(batch, ['content_digest'])
+            batch = []
+    if batch:
+        Post.objects.using(db_alias).bulk_update(batch, ['content_digest'])
+
+    # Posts that differ only in case or whitespace were distinct before but
+    # collide now; stop with a clear message rather than an IntegrityError.
+    collisions = (
+        Post.objects.using(db_alias).values('content_digest')
+        .annotate(total=Count('id')).filter(total__gt=1)
+    )
+    if collisions.exists():
+        ids = [
+            list(Post.objects.using(db_alias).filter(content_digest=row['content_digest']).values_list('id', flat=True))
+            for row in collisions[:10]
+        ]
+        raise RuntimeError(f'Duplicate posts must be merged before migrating (post ids: {ids}).')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_digest',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_content_digest, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='post',
+            name='content_digest',
+            field=models.CharField(editable=False, max_length=64, unique=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name='post',
+            unique_together=set(),
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='blog_post_title_1b1577_idx',
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_count(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    db_alias = schema_editor.connection.alias
+    counts = (
+        Comment.objects.using(db_alias).filter(post=OuterRef('pk'))
+        .order_by().values('post').annotate(total=Count('id')).values('total')
+    )
+    Post.objects.using(db_alias).update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_content_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_comment_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Comment', 'verbose_name_plural': 'Comments'},
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-created_at', '-id'], name='blog_comment_post_created_idx'),
+        ),
+    ]
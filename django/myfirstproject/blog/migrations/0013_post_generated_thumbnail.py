@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+def clear_missing_thumbnails(apps, schema_editor):
+    # The old default pointed at a file that never existed; an empty
+    # thumbnail shows the placeholder until generate_thumbnails runs.
+    Post = apps.get_model('blog', 'Post')
+    db_alias = schema_editor.connection.alias
+    Post.objects.using(db_alias).filter(thumbnail='fallback_thumbnail.png').update(thumbnail='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_comment_post_created_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='thumbnail',
+            field=models.ImageField(blank=True, default='', editable=False, upload_to=''),
+        ),
+        migrations.RunPython(clear_missing_thumbnails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:48
+
+import hashlib
+import re
+
+from django.db import migrations, models
+
+
+# Frozen copies of blog.models.make_comment_digest and make_simhash as of this
+# migration, so later changes to the model code cannot change the backfill.
+def make_comment_digest(content):
+    normalized = ' '.join((content or '').split()).casefold()
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=32).hexdigest()
+
+
+def make_simhash(content):
+    words = re.findall(r'\w+', (content or '').casefold())
+    weights = [0] * 64
+    for feature in words + [f'{first} {second}' for first, second in zip(words, words[1:])]:
+        value = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    simhash = sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+    return simhash - (1 << 64) if simhash >= 1 << 63 else simhash
+
+
+def backfill_fingerprints(apps, schema_editor):
+    Comment = apps.get_model('blog', 'Comment')
+    db_alias = schema_editor.connection.alias
+    # Generated data repeats a few texts many times over
+    fingerprints = {}
+    batch = []
+    comments = Comment.objects.using(db_alias).only('id', 'content').order_by('pk')
+    for comment in comments.iterator(chunk_size=2000):
+        if comment.content not in fingerprints:
+            if len(fingerprints) >= 10000:
+                fingerprints.clear()
+            fingerprints[comment.content] = (make_comment_digest(comment.content), make_simhash(comment.content))
+        comment.content_digest, comment.simhash = fingerprints[comment.content]
+        batch.append(comment)
+        if len(batch) >= 2000:
+            Comment.objects.using(db_alias).bulk_update(batch, ['content_digest', 'simhash'])
+            batch = []
+    if batch:
+        Comment.objects.using(db_alias).bulk_update(batch, ['content_digest', 'simhash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_post_generated_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='content_digest',
+            field=models.CharField(default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='simhash',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'email', '-created_at'], name='blog_comment_post_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['content_digest', '-created_at'], name='blog_comment_digest_idx'),
+        ),
+    ]
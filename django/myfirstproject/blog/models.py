@@ -1,5 +1,11 @@
-from django.db import models
+import hashlib
+import re
+
+from django.core.exceptions import ValidationError
+from django.db import models, router, transaction
 from django.contrib.auth.models import User
+from django.db.models.functions import Substr
+from django.templatetags.static import static
 from django.utils import timezone
 
 # Create your models here.
@@ -22,6 +28,95 @@ class Category(models.Model):
             models.Index(fields=['name', 'description']),
         ]
 
+def make_content_digest(title, content):
+    """
+    BLAKE2b digest of a post's normalized title and content.
+
+    Case and runs of whitespace are ignored, so posts differing only in
+    formatting count as duplicates. The unique index stores these 64 hex
+    characters instead of a copy of every post body.
+    """
+    normalized_title = ' '.join((title or '').split()).casefold()
+    normalized_content = ' '.join((content or '').split()).casefold()
+    payload = f'{normalized_title}\x00{normalized_content}'.encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=32).hexdigest()
+
+
+def make_comment_digest(content):
+    """BLAKE2b digest of a comment's content, ignoring case and runs of whitespace."""
+    normalized = ' '.join((content or '').split()).casefold()
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=32).hexdigest()
+
+
+def make_simhash(content):
+    """
+    64-bit SimHash of a comment's words and word pairs, as a signed integer
+    so it fits a BigIntegerField. Comments that differ by a word or some
+    punctuation get hashes a few bits apart; see hamming_distance().
+    """
+    words = re.findall(r'\w+', (content or '').casefold())
+    weights = [0] * 64
+    for feature in words + [f'{first} {second}' for first, second in zip(words, words[1:])]:
+        value = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    simhash = sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+    return simhash - (1 << 64) if simhash >= 1 << 63 else simhash
+
+
+def hamming_distance(first, second):
+    """Number of bits that differ between two make_simhash() values."""
+    return ((first ^ second) & ((1 << 64) - 1)).bit_count()
+
+
+class PostQuerySet(models.QuerySet):
+    """
+    Loaders that fetch exactly what each post page renders, so the number of
+    queries stays the same however many posts are on the page.
+    """
+
+    # How much of the body the list page needs for `truncatewords:20`.
+    EXCERPT_LENGTH = 300
+
+    def for_list(self):
+        """
+        Posts for the card list: author and category are joined in, and the
+        full body is replaced by a short `excerpt` so it never leaves the db.
+        """
+        return (
+            self.select_related('author', 'category')
+            .only(
+                'id', 'title', 'slug', 'status', 'thumbnail',
+                'created_at', 'updated_at', 'published_date', 'comment_count',
+                'author__id', 'author__username',
+                'category__id', 'category__name',
+            )
+            .annotate(excerpt=Substr('content', 1, self.EXCERPT_LENGTH))
+        )
+
+    def for_export(self):
+        """
+        Posts for the NDJSON/JSON export: the full body and both timestamps,
+        with author and category joined in.
+        """
+        return (
+            self.select_related('author', 'category')
+            .only(
+                'id', 'title', 'slug', 'status', 'content',
+                'created_at', 'updated_at', 'published_date', 'comment_count',
+                'author__id', 'author__username',
+                'category__id', 'category__name',
+            )
+        )
+
+    def for_detail(self):
+        """
+        A single post with its author and category joined in. Comments are
+        paged separately (see Comment.objects.for_post()).
+        """
+        return self.select_related('author', 'category')
+
+
 class Post(models.Model):
     STATUS_CHOICES = (
         ('draft', 'Draft'),
@@ -33,15 +128,69 @@ class Post(models.Model):
     author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='posts')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True ,related_name='posts')
     featured_image = models.ImageField(default='fallback.png', blank=True )
-    thumbnail = models.ImageField(default='fallback_thumbnail.png', blank=True )
+    # Generated from featured_image by blog.thumbnails; empty until that is done
+    thumbnail = models.ImageField(default='', blank=True, editable=False)
     content = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     published_date = models.DateTimeField(null=True, blank=True)
+    # Stands in for the old unique (title, content) pair; see make_content_digest().
+    # Kept up to date by save(); queryset.update() callers must set it themselves.
+    content_digest = models.CharField(max_length=64, unique=True, editable=False)
+    # Denormalized count of comments, maintained by blog.signals with F() updates
+    # so concurrent comments never overwrite each other's increments.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.title
+
+    # File fields whose replaced files get cleaned up (see blog.signals)
+    FILE_FIELDS = ('featured_image', 'thumbnail')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The file names as loaded, so a save that replaces one knows what to
+        # delete without re-reading the row. Deferred fields are left out.
+        instance._stored_files = {
+            name: instance.__dict__[name] for name in cls.FILE_FIELDS if name in instance.__dict__
+        }
+        return instance
+
+    def replaced_files(self):
+        """Names of files loaded with this post that it no longer uses."""
+        stored = getattr(self, '_stored_files', {})
+        return [
+            old for name, old in stored.items()
+            if old and old != getattr(self, name).name
+        ]
+
+    def save(self, *args, **kwargs):
+        self.content_digest = make_content_digest(self.title, self.content)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'title', 'content'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'content_digest'}
+        super().save(*args, **kwargs)
+
+    @property
+    def thumbnail_url(self):
+        """The thumbnail, or a placeholder while it is being generated."""
+        from .thumbnails import THUMBNAIL_PLACEHOLDER
+
+        return self.thumbnail.url if self.thumbnail else static(THUMBNAIL_PLACEHOLDER)
+
+    def validate_unique(self, exclude=None):
+        # content_digest is not a form field, so ModelForm would skip its unique
+        # check and let the database raise IntegrityError; check it here instead.
+        super().validate_unique(exclude)
+        if exclude and ('title' in exclude or 'content' in exclude):
+            return
+        digest = make_content_digest(self.title, self.content)
+        if Post.objects.filter(content_digest=digest).exclude(pk=self.pk).exists():
+            raise ValidationError('A post with this title and content already exists.')
     
     def publish(self):
         self.published_date = timezone.now()
@@ -53,29 +202,62 @@ class Post(models.Model):
     
     class Meta:
         db_table = 'blog_post'
-        ordering = ['-created_at']
+        # id breaks ties between posts created in the same instant, which keeps
+        # the ordering unique so keyset pagination never skips or repeats rows
+        ordering = ['-created_at', '-id']
         verbose_name = 'Post'
         verbose_name_plural = 'Posts'
-        unique_together = ('title', 'content')
         indexes = [
-            models.Index(fields=['title', 'content']),
+            models.Index(fields=['-created_at', '-id'], name='blog_post_created_id_idx'),
         ]
 
+class CommentQuerySet(models.QuerySet):
+
+    def for_post(self, post):
+        """The comments of one post, with only the fields a comment card shows."""
+        return self.filter(post=post).only('id', 'post', 'name', 'content', 'created_at')
+
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     name = models.CharField(max_length=255)
     email = models.EmailField()
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Fingerprints of the content for blog.duplicates, kept up to date by save():
+    # an exact digest and a SimHash for near-duplicates
+    content_digest = models.CharField(max_length=64, default='', editable=False)
+    simhash = models.BigIntegerField(default=0, editable=False)
+
+    objects = CommentQuerySet.as_manager()
 
     def __str__(self):
         return f'Comment by {self.name} on {self.post.title}'
 
+    def save(self, *args, **kwargs):
+        self.content_digest = make_comment_digest(self.content)
+        self.simhash = make_simhash(self.content)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'content_digest', 'simhash'}
+        # post_save bumps Post.comment_count (blog.signals); the INSERT and the
+        # count commit together or not at all. delete() is atomic already.
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        # No savepoint: inside a caller's transaction a failure rolls back the lot
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
     class Meta:
         db_table = 'blog_comment'
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
         indexes = [
             models.Index(fields=['name', 'email']),
+            # Serves "newest comments of one post" pages straight off the index
+            models.Index(fields=['post', '-created_at', '-id'], name='blog_comment_post_created_idx'),
+            # Duplicate checks (blog.duplicates): one commenter's recent comments
+            # on a post, and recent copies of the same text anywhere
+            models.Index(fields=['post', 'email', '-created_at'], name='blog_comment_post_email_idx'),
+            models.Index(fields=['content_digest', '-created_at'], name='blog_comment_digest_idx'),
         ]
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Keyset (cursor) pagination for the blog.
+
+OFFSET pagination makes the database walk and throw away every row before the
+requested page, so page 1000 costs a thousand times more than page 1. Keyset
+pagination remembers the sort key of the last row we showed and asks for the
+rows that come after it, which an index on the sort key answers directly.
+
+Cursors are opaque to the client: a url-safe base64 encoded JSON payload
+holding the direction and the key values of the boundary row.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded."""
+
+
+def get_page_size(request, default=None, maximum=None):
+    """
+    Read `page_size` from the query string, falling back to the setting
+    and clamping it to the configured maximum.
+    """
+    default = default or getattr(settings, 'BLOG_POSTS_PAGE_SIZE', 12)
+    maximum = maximum or getattr(settings, 'BLOG_POSTS_MAX_PAGE_SIZE', 100)
+    try:
+        page_size = int(request.GET.get('page_size', default))
+    except (TypeError, ValueError):
+        page_size = default
+    return max(1, min(page_size, maximum))
+
+
+class KeysetPage:
+    """A single page of results plus the cursors to move around."""
+
+    def __init__(self, object_list, page_size, next_cursor=None, prev_cursor=None):
+        self.object_list = object_list
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset on a unique, ordered key such as ('-created_at', '-id').
+
+    Every field in `ordering` must sort in the same direction and the last one
+    must be unique, otherwise rows sharing a key could be skipped or repeated.
+    """
+
+    def __init__(self, queryset, page_size, ordering=('-created_at', '-id')):
+        descending = {field.startswith('-') for field in ordering}
+        if len(descending) != 1:
+            raise ValueError('All keyset ordering fields must share one direction.')
+
+        self.queryset = queryset
+        self.page_size = page_size
+        self.ordering = tuple(ordering)
+        self.descending = descending.pop()
+        self.fields = [field.lstrip('-') for field in ordering]
+
+    # Cursor encoding ---------------------------------------------------------
+
+    def encode_cursor(self, obj, direction):
+        values = []
+        for name in self.fields:
+            value = getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps({'d': direction, 'k': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, raw_values = payload['d'], payload['k']
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise InvalidCursor('Malformed pagination cursor.')
+
+        if (
+            direction not in ('n', 'p')
+            or not isinstance(raw_values, list)
+            or len(raw_values) != len(self.fields)
+            # Only the scalars encode_cursor() writes; no nulls, lists or objects
+            or not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in raw_values)
+        ):
+            raise InvalidCursor('Malformed pagination cursor.')
+
+        model = self.queryset.model
+        try:
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, raw_values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor('Malformed pagination cursor.')
+        if any(value is None for value in values):
+            raise InvalidCursor('Malformed pagination cursor.')
+        # encode_cursor() writes aware datetimes; a naive one would be read
+        # in the wrong zone
+        if settings.USE_TZ and any(
+            isinstance(value, datetime.datetime) and timezone.is_naive(value) for value in values
+        ):
+            raise InvalidCursor('Malformed pagination cursor.')
+        return direction, values
+
+    # Query building ----------------------------------------------------------
+
+    def _seek(self, values, after):
+        """
+        Build the row-value comparison (a, b) > (x, y) as
+        a > x OR (a = x AND b > y), which SQLite can run off the index.
+        """
+        lookup = 'lt' if self.descending == after else 'gt'
+        condition = Q()
+        for position, name in enumerate(self.fields):
+            branch = Q(**{f'{name}__{lookup}': values[position]})
+            for earlier, value in zip(self.fields[:position], values[:position]):
+                branch &= Q(**{earlier: value})
+            condition |= branch
+        return condition
+
+    def _reversed_ordering(self):
+        return [name if self.descending else f'-{name}' for name in self.fields]
+
+    def _plan(self, cursor):
+        """The queryset to fetch for `cursor` and the direction it walks in."""
+        limit = self.page_size + 1
+        if not cursor:
+            return self.queryset.order_by(*self.ordering)[:limit], None
+
+        direction, values = self.decode_cursor(cursor)
+        if direction == 'n':
+            queryset = self.queryset.filter(self._seek(values, after=True))
+            return queryset.order_by(*self.ordering)[:limit], 'n'
+
+        # Walking backwards: fetch in reverse order, the page is flipped later
+        queryset = self.queryset.filter(self._seek(values, after=False))
+        return queryset.order_by(*self._reversed_ordering())[:limit], 'p'
+
+    def _build(self, rows, direction):
+        size = self.page_size
+        has_more = len(rows) > size
+        rows = rows[:size]
+
+        if direction is None:
+            next_cursor = self.encode_cursor(rows[-1], 'n') if has_more else None
+            return KeysetPage(rows, size, next_cursor=next_cursor)
+
+        if direction == 'n':
+            next_cursor = self.encode_cursor(rows[-1], 'n') if has_more else None
+            prev_cursor = self.encode_cursor(rows[0], 'p') if rows else None
+            return KeysetPage(rows, size, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+        rows = rows[::-1]
+        prev_cursor = self.encode_cursor(rows[0], 'p') if has_more else None
+        next_cursor = self.encode_cursor(rows[-1], 'n') if rows else None
+        return KeysetPage(rows, size, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+    def page(self, cursor=None):
+        """Return the KeysetPage that starts at `cursor` (or the first page)."""
+        queryset, direction = self._plan(cursor)
+        return self._build(list(queryset), direction)
+
+    async def apage(self, cursor=None):
+        """Async version of page(), for async views."""
+        queryset, direction = self._plan(cursor)
+        return self._build([obj async for obj in queryset], direction)
@@ -0,0 +1,156 @@
+"""
+Posts kept in memory rather than in the database: the sample posts served
+by views.get_post_detail() and the JSON file at settings.BLOG_POSTS_JSON
+(data/posts.json), read by views.load_posts().
+
+The file is parsed once and kept, with an index by id and one by date,
+until its size or mtime changes. Files above BLOG_POSTS_JSON_STREAMING_BYTES
+are parsed one post at a time instead of reading all the text into memory
+first.
+"""
+import bisect
+import datetime
+import json
+import os
+import threading
+
+from django.conf import settings
+
+DEFAULT_STREAMING_BYTES = 32 * 1024 * 1024
+
+
+class PostIndex:
+    """
+    An immutable set of post dicts, newest first, with O(1) lookup by id
+    and binary-search lookup by date.
+
+    `date_of` maps a post to a sortable value; ISO 8601 strings sort
+    correctly as they are.
+    """
+
+    def __init__(self, posts, date_of):
+        self.posts = tuple(sorted(posts, key=date_of, reverse=True))
+        self.by_id = {post['id']: post for post in self.posts}
+        # Oldest first, for bisect
+        self._dates = [date_of(post) for post in reversed(self.posts)]
+
+    def __len__(self):
+        return len(self.posts)
+
+    def __iter__(self):
+        return iter(self.posts)
+
+    def get(self, post_id):
+        return self.by_id.get(post_id)
+
+    def between(self, start=None, end=None):
+        """Posts dated from `start` to `end` inclusive, newest first."""
+        count = len(self._dates)
+        low = bisect.bisect_left(self._dates, start) if start is not None else 0
+        high = bisect.bisect_right(self._dates, end) if end is not None else count
+        # Positions in _dates run oldest first; self.posts runs the other way
+        return self.posts[count - high:count - low]
+
+
+def iter_json_array(handle, chunk_size=64 * 1024):
+    """
+    Yield the items of the JSON array in the text file `handle` one at a
+    time, holding at most about one item plus one chunk of text.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    started = False
+
+    while True:
+        # Skip whitespace and separators between items
+        while position < len(buffer) and buffer[position] in ' \t\r\n,[]':
+            if buffer[position] == '[':
+                started = True
+            elif buffer[position] == ']' and started:
+                return
+            position += 1
+
+        if position < len(buffer):
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                item = end = None
+            # An item ending exactly at the buffer's end (a number, say) may
+            # continue in the next chunk
+            if item is not None and (end < len(buffer) or eof):
+                if not started:
+                    raise ValueError('Expected a JSON array.')
+                yield item
+                position = end
+                continue
+
+        if eof:
+            if not started:
+                raise ValueError('Expected a JSON array.')
+            return
+        chunk = handle.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def published_date(post):
+    return post.get('published_date') or ''
+
+
+def date_posted(post):
+    """The sample posts' 'August 27, 2018' dates, as sortable ISO strings."""
+    return datetime.datetime.strptime(post['date_posted'], '%B %d, %Y').date().isoformat()
+
+
+class JsonPostStore:
+    """
+    The posts of one JSON file, re-read only when the file changes.
+
+    load() costs a stat() when nothing changed. Concurrent callers during a
+    reload wait for the one doing it instead of all parsing the file.
+    """
+
+    def __init__(self, path, streaming_bytes=DEFAULT_STREAMING_BYTES):
+        self.path = os.fspath(path)
+        self.streaming_bytes = streaming_bytes
+        self._lock = threading.Lock()
+        self._version = None
+        self._index = None
+
+    def _read(self, size):
+        with open(self.path, encoding='utf-8') as handle:
+            if size > self.streaming_bytes:
+                return list(iter_json_array(handle))
+            return json.load(handle)
+
+    def load(self):
+        """The file's PostIndex, parsing the file if it changed."""
+        file_stat = os.stat(self.path)
+        version = (file_stat.st_size, file_stat.st_mtime_ns)
+        if version == self._version:
+            return self._index
+        with self._lock:
+            if version != self._version:
+                self._index = PostIndex(self._read(file_stat.st_size), published_date)
+                self._version = version
+            return self._index
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=None):
+    """The shared JsonPostStore for `path` (default: settings.BLOG_POSTS_JSON)."""
+    path = os.fspath(path or settings.BLOG_POSTS_JSON)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = JsonPostStore(
+                path, getattr(settings, 'BLOG_POSTS_JSON_STREAMING_BYTES', DEFAULT_STREAMING_BYTES),
+            )
+        return _stores[path]
@@ -0,0 +1,174 @@
+"""
+Full-text search over posts using SQLite FTS5.
+
+`blog_post_fts` is an external-content FTS5 table: it stores only the search
+index and reads title/content back from `blog_post` by rowid. Triggers on
+`blog_post` keep the index in step with every insert, update and delete,
+including bulk_create() and queryset.update() which skip model signals.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = 'blog_post_fts'
+
+# Column weights for bm25(): a hit in the title counts ten times a body hit.
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+
+# Control characters never typed by users, swapped for <mark> after escaping.
+_HIGHLIGHT_START = '\x02'
+_HIGHLIGHT_END = '\x03'
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content,
+        content='blog_post', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+TRIGGER_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON blog_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON blog_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, content ON blog_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def is_available(using=connection):
+    """FTS5 is a SQLite feature; other backends fall back to LIKE search."""
+    return using.vendor == 'sqlite'
+
+
+def is_installed(using=connection):
+    """Whether the FTS table exists; it is created by migration 0009."""
+    return is_available(using) and FTS_TABLE in using.introspection.table_names()
+
+
+def install(using=connection):
+    """Create the FTS table and its triggers if they are missing."""
+    if not is_available(using):
+        return
+    with using.cursor() as cursor:
+        for statement in CREATE_SQL + TRIGGER_SQL:
+            cursor.execute(statement)
+
+
+def install_triggers(using=connection):
+    """
+    Put back the triggers of an existing FTS table. SQLite migrations that
+    rebuild `blog_post` drop them along with the old table.
+    """
+    if not is_installed(using):
+        return
+    with using.cursor() as cursor:
+        for statement in TRIGGER_SQL:
+            cursor.execute(statement)
+
+
+def uninstall(using=connection):
+    if not is_available(using):
+        return
+    with using.cursor() as cursor:
+        for statement in DROP_SQL:
+            cursor.execute(statement)
+
+
+def rebuild(using=connection):
+    """Recreate the whole index from the rows currently in blog_post."""
+    install(using)
+    with using.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def build_match_query(text):
+    """
+    Turn free text typed by a user into a safe FTS5 MATCH expression.
+
+    Each word becomes a quoted prefix term, so FTS5 operators and stray
+    quotes in the input cannot produce a syntax error. Terms are ANDed.
+    """
+    words = re.findall(r'\w+', text or '')
+    return ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+
+def matching_ids_sql(match):
+    """A RawSQL subquery of post ids matching `match`, for use with pk__in."""
+    return RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+
+
+def _highlight(snippet):
+    html = escape(snippet)
+    html = html.replace(_HIGHLIGHT_START, '<mark>').replace(_HIGHLIGHT_END, '</mark>')
+    return mark_safe(html)
+
+
+def search_posts(text, queryset=None, limit=20):
+    """
+    Return up to `limit` posts matching `text`, best match first.
+
+    Each post gets a `rank` (bm25, lower is better) and an HTML-safe
+    `snippet` of the body with the matched words wrapped in <mark>.
+    """
+    from .models import Post
+
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT rowid,
+                   bm25({FTS_TABLE}, %s, %s) AS rank,
+                   snippet({FTS_TABLE}, 1, %s, %s, '…', 24)
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH %s
+            ORDER BY rank
+            LIMIT %s
+            """,
+            [TITLE_WEIGHT, CONTENT_WEIGHT, _HIGHLIGHT_START, _HIGHLIGHT_END, match, limit],
+        )
+        hits = cursor.fetchall()
+
+    if queryset is None:
+        queryset = Post.objects.for_list()
+    posts = queryset.in_bulk([post_id for post_id, _, _ in hits])
+
+    results = []
+    for post_id, rank, snippet in hits:
+        post = posts.get(post_id)
+        if post is None:
+            continue
+        post.rank = rank
+        post.snippet = _highlight(snippet)
+        results.append(post)
+    return results
@@ -0,0 +1,86 @@
+"""
+Signal handlers for the blog app, connected in BlogConfig.ready().
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache, media_cleanup, thumbnails
+from .models import Category, Comment, Post
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    # F() makes the database do the arithmetic, so two comments saved at the
+    # same moment both count instead of one overwriting the other.
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(comment_count=F('comment_count') + 1)
+
+
+def _deleted_with_post(kwargs):
+    # Comments going away because their post is: nothing left to count or
+    # to re-render, and one query per comment would add up. A queryset
+    # delete (the admin's "delete selected") passes the queryset.
+    origin = kwargs.get('origin')
+    return isinstance(origin, Post) or (isinstance(origin, QuerySet) and issubclass(origin.model, Post))
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    if _deleted_with_post(kwargs):
+        return
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1
+    )
+
+
+# Page cache invalidation (see blog.cache)
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    # Any post change can move posts between list pages, so all of them go
+    cache.invalidate('post-list', f'post:{instance.pk}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    if _deleted_with_post(kwargs):
+        return
+    # Only the post's own detail page and the list cards showing its count
+    cache.invalidate(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_pages(sender, instance, **kwargs):
+    cache.invalidate(f'category:{instance.pk}')
+
+
+# Thumbnails (see blog.thumbnails)
+
+@receiver(post_save, sender=Post)
+def queue_thumbnail(sender, instance, raw=False, **kwargs):
+    if not raw and thumbnails.needs_thumbnail(instance):
+        # After commit, so the job's update can see the saved image
+        transaction.on_commit(partial(thumbnails.schedule, instance))
+
+
+# Uploaded files (see blog.media_cleanup)
+
+@receiver(post_save, sender=Post)
+def delete_replaced_files(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    media_cleanup.delete_later(*instance.replaced_files())
+    # Later saves of the same instance compare against what is stored now
+    instance._stored_files = {name: getattr(instance, name).name for name in Post.FILE_FIELDS}
+
+
+@receiver(post_delete, sender=Post)
+def delete_post_files(sender, instance, **kwargs):
+    media_cleanup.delete_later(instance.featured_image.name, instance.thumbnail.name)
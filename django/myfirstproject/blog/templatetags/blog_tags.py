@@ -0,0 +1,88 @@
+from django import template
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import render_to_string
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from blog import variants
+from blog.cache import fragment_stats
+from myfirstproject.staticfiles import VENDOR_ASSETS
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card(post):
+    """
+    Render posts/_post_card.html for one post, cached per post.
+
+    The key changes whenever anything printed on the card does, so only
+    edited cards are re-rendered. comment_count and the category/author
+    names are included because they change without touching updated_at.
+    Hits and misses are counted in blog.cache.fragment_stats.
+    """
+    config = getattr(settings, 'BLOG_FRAGMENT_CACHE', {})
+    cache = caches[config.get('ALIAS', 'default')]
+    key = make_template_fragment_key('post_card', [
+        post.pk,
+        post.updated_at.isoformat() if post.updated_at else '',
+        post.comment_count,
+        post.category.name if post.category_id else '',
+        post.author.username if post.author_id else '',
+    ])
+
+    html = cache.get(key)
+    fragment_stats.record(hit=html is not None)
+    if html is None:
+        html = render_to_string('posts/_post_card.html', {'post': post})
+        cache.set(key, html, config.get('TIMEOUT', 3600))
+    return mark_safe(html)
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', css_class='', loading='lazy'):
+    """
+    An <img> for an ImageField file with a srcset of its resized copies and
+    a WebP <source> for browsers that take it (see blog.variants).
+
+    Until the copies exist, the original is shown on its own. `sizes` tells
+    the browser how wide the image is drawn, which is how it picks a copy.
+    """
+    manifest = variants.get_manifest(image)
+    if manifest is None:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+            image.url, alt, css_class, loading,
+        )
+
+    url = image.storage.url
+    copies = manifest['variants']
+    largest = copies[-1]
+    webp_source = ''
+    if all('webp' in copy for copy in copies):
+        webp_source = format_html(
+            '<source type="image/webp" srcset="{}" sizes="{}">',
+            ', '.join(f"{url(copy['webp'])} {copy['width']}w" for copy in copies), sizes,
+        )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" '
+        'alt="{}" class="{}" loading="{}" decoding="async"></picture>',
+        webp_source,
+        url(largest['jpeg']),
+        ', '.join(f"{url(copy['jpeg'])} {copy['width']}w" for copy in copies),
+        sizes, largest['width'], largest['height'], alt, css_class, loading,
+    )
+
+
+@register.simple_tag
+def vendor_asset(name):
+    """
+    URL of a third-party asset: the copy under static/vendor/ when
+    settings.STATIC_VENDOR_ASSETS is on, its CDN otherwise.
+    """
+    if getattr(settings, 'STATIC_VENDOR_ASSETS', False):
+        return static(f'vendor/{name}')
+    return VENDOR_ASSETS[name]
@@ -1,3 +1,1204 @@
-from django.test import TestCase
+import base64
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO, StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, Client, RequestFactory, TestCase, override_settings
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils import timezone
+
+from PIL import Image
+
+from myfirstproject.media import parse_range
+from myfirstproject import ratelimit, sqlite, staticfiles
+from myfirstproject.routers import (
+    PIN_COOKIE, PrimaryReplicaRouter, ReplicaPinningMiddleware, allow_replica_reads, replica_reads_allowed,
+    reset_replica_reads,
+)
+from myfirstproject.middleware import get_budget
+from myfirstproject.testing import QueryBudgetMixin
+
+from .apps import install_search_triggers
+from .forms import CommentForm, PostForm
+from .models import Category, Comment, Post, PostQuerySet, hamming_distance, make_content_digest, make_simhash
+from .pagination import KeysetPaginator, InvalidCursor
+from .templatetags.blog_tags import responsive_image, vendor_asset
+from . import async_views, duplicates, imaging, media_cleanup, post_store, search, thumbnails, variants, views, workers
+from .cache import CSRF_PLACEHOLDER, fragment_stats
 
 # Create your tests here.
+
+
+# Image jobs would write into the real MEDIA_ROOT; tests that want them
+# turn them back on with a temporary one
+@override_settings(BLOG_THUMBNAILS={'ENABLED': False}, BLOG_IMAGE_VARIANTS={'ENABLED': False})
+class BlogTestCase(TestCase):
+    """Cached pages outlive the per-test transaction, so start each test clean."""
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+
+class KeysetPaginationTests(BlogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(25):
+            Post.objects.create(title=f'Post {i}', slug=f'post-{i}', content=f'Content {i}')
+
+    def walk_forward(self, paginator):
+        seen, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            seen.extend(post.pk for post in page)
+            if not page.has_next():
+                return seen, page
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_post_once_in_order(self):
+        paginator = KeysetPaginator(Post.objects.all(), page_size=10)
+        seen, _ = self.walk_forward(paginator)
+        expected = list(Post.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_previous_cursor_returns_the_earlier_page(self):
+        paginator = KeysetPaginator(Post.objects.all(), page_size=10)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        back = paginator.page(second.prev_cursor)
+        self.assertEqual([p.pk for p in back], [p.pk for p in first])
+        self.assertFalse(back.has_previous())
+
+    def test_invalid_cursor(self):
+        paginator = KeysetPaginator(Post.objects.all(), page_size=10)
+        with self.assertRaises(InvalidCursor):
+            paginator.page('not-a-cursor')
+        response = self.client.get(reverse('post_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_well_formed_cursor_with_bad_keys(self):
+        for payload in (
+            {'d': 'n', 'k': 5},
+            {'d': 'n', 'k': [[1], 2]},
+            {'d': 'n', 'k': [None, None]},
+            {'d': 'n', 'k': ['yesterday', 1]},
+            {'d': 'n', 'k': ['2025-01-01T00:00:00', {'id': 1}]},
+            {'d': 'n', 'k': ['2025-01-01T00:00:00', 1]},
+            ['n', [1, 2]],
+        ):
+            token = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+            response = self.client.get(reverse('post_list'), {'cursor': token})
+            self.assertEqual(response.status_code, 404, payload)
+
+    def test_post_list_respects_page_size(self):
+        response = self.client.get(reverse('post_list'), {'page_size': 5})
+        self.assertEqual(len(response.context['posts']), 5)
+        self.assertTrue(response.context['page'].has_next())
+
+
+class PostQueryCountTests(BlogTestCase):
+    """The post pages must not issue a query per card or per comment."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username='writer')
+        category = Category.objects.create(name='Django', slug='django')
+        for i in range(30):
+            post = Post.objects.create(
+                title=f'Post {i}', slug=f'post-{i}', content='word ' * 500,
+                author=author, category=category,
+            )
+            for j in range(3):
+                Comment.objects.create(post=post, name=f'Reader {j}', email='reader@example.com', content='Nice')
+        cls.post = post
+
+    def test_post_list_query_count_is_independent_of_page_size(self):
+        for page_size in (1, 10, 30):
+            with self.subTest(page_size=page_size), self.assertNumQueries(1):
+                response = self.client.get(reverse('post_list'), {'page_size': page_size})
+                self.assertEqual(len(response.context['posts']), page_size)
+
+    def test_post_list_does_not_load_full_content(self):
+        post = Post.objects.for_list().first()
+        self.assertIn('content', post.get_deferred_fields())
+        self.assertLessEqual(len(post.excerpt), PostQuerySet.EXCERPT_LENGTH)
+
+    def test_post_detail_query_count(self):
+        with self.assertNumQueries(2):
+            self.client.get(reverse('post_detail', args=[self.post.slug]))
+
+
+class CommentPaginationTests(BlogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = Post.objects.create(title='Popular', slug='popular', content='Body')
+        for i in range(45):
+            Comment.objects.create(post=cls.post, name=f'Reader {i}', email='reader@example.com', content=f'Comment {i}')
+
+    @override_settings(BLOG_COMMENTS_PAGE_SIZE=20)
+    def test_detail_renders_first_page_and_endpoint_serves_the_rest(self):
+        response = self.client.get(reverse('post_detail', args=[self.post.slug]))
+        seen = [comment.pk for comment in response.context['comments']]
+        self.assertEqual(len(seen), 20)
+        cursor = response.context['comments_page'].next_cursor
+
+        while cursor:
+            data = self.client.get(reverse('post_comments', args=[self.post.slug]), {'cursor': cursor}).json()
+            seen.extend(comment['id'] for comment in data['comments'])
+            cursor = data['next_cursor']
+
+        self.assertEqual(seen, list(self.post.comments.values_list('pk', flat=True)))
+
+    def test_endpoint_rejects_bad_cursor(self):
+        response = self.client.get(reverse('post_comments', args=[self.post.slug]), {'cursor': '!!'})
+        self.assertEqual(response.status_code, 400)
+
+
+class PostSearchTests(BlogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.match = Post.objects.create(title='Caching in Django', slug='caching', content='Use the cache framework wisely.')
+        Post.objects.create(title='Unrelated', slug='unrelated', content='Nothing to see here.')
+
+    def test_search_ranks_and_highlights(self):
+        results = search.search_posts('cache')
+        self.assertEqual([post.pk for post in results], [self.match.pk])
+        self.assertIn('<mark>', results[0].snippet)
+
+    def test_index_follows_updates_and_deletes(self):
+        Post.objects.filter(pk=self.match.pk).update(content='Completely different words.')
+        self.assertEqual(search.search_posts('framework'), [])
+        self.match.delete()
+        self.assertEqual(search.search_posts('different'), [])
+
+    def test_operators_in_user_input_are_harmless(self):
+        self.assertEqual(search.search_posts('"cache OR ('), [])
+        response = self.client.get(reverse('post_search'), {'q': 'cache'})
+        self.assertContains(response, 'Caching in Django')
+
+    def fts_objects(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE 'blog_post_fts_a_'")
+            return sorted(name for name, in cursor.fetchall())
+
+    def test_migrate_puts_back_dropped_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER blog_post_fts_ai')
+        install_search_triggers(sender=None, using='default')
+        self.assertEqual(self.fts_objects(), ['blog_post_fts_ad', 'blog_post_fts_ai', 'blog_post_fts_au'])
+
+    def test_migrate_leaves_an_unapplied_index_alone(self):
+        search.uninstall(connection)
+        install_search_triggers(sender=None, using='default')
+        self.assertFalse(search.is_installed(connection))
+        self.assertEqual(self.fts_objects(), [])
+
+
+class PostContentDigestTests(BlogTestCase):
+
+    def test_duplicate_posts_are_rejected_by_the_form(self):
+        Post.objects.create(title='Hello', slug='hello', content='Same   body')
+        form = PostForm(data={'title': 'hello', 'slug': 'hello-2', 'content': 'Same body', 'status': 'draft'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('already exists', str(form.non_field_errors()))
+
+    def test_digest_follows_edits(self):
+        post = Post.objects.create(title='Hello', slug='hello', content='First')
+        original = post.content_digest
+        post.content = 'Second'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertNotEqual(post.content_digest, original)
+        self.assertEqual(post.content_digest, make_content_digest('Hello', 'Second'))
+
+
+class CommentCountTests(BlogTestCase):
+
+    def setUp(self):
+        self.post = Post.objects.create(title='Counted', slug='counted', content='Body')
+
+    def add_comment(self):
+        return Comment.objects.create(post=self.post, name='Reader', email='reader@example.com', content='Hi')
+
+    def test_count_follows_creates_and_deletes(self):
+        first = self.add_comment()
+        self.add_comment()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+
+        first.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_deleting_a_post_skips_per_comment_work(self):
+        for number in range(20):
+            Comment.objects.create(post=self.post, name='Reader', email=f'reader{number}@example.com', content='Hi')
+        pk = self.post.pk
+        with self.captureOnCommitCallbacks(), mock.patch('blog.cache.invalidate') as invalidate:
+            # Select the comments, delete them in one statement, delete the post
+            with self.assertNumQueries(3):
+                self.post.delete()
+        invalidate.assert_called_once_with('post-list', f'post:{pk}')
+
+    def test_queryset_delete_skips_per_comment_work(self):
+        for number in range(20):
+            Comment.objects.create(post=self.post, name='Reader', email=f'reader{number}@example.com', content='Hi')
+        with self.captureOnCommitCallbacks(), mock.patch('blog.cache.invalidate') as invalidate:
+            # As above, plus selecting the posts
+            with self.assertNumQueries(4):
+                Post.objects.filter(pk=self.post.pk).delete()
+        invalidate.assert_called_once_with('post-list', f'post:{self.post.pk}')
+
+    def test_count_rolls_back_with_the_comment(self):
+        with mock.patch.object(Post.objects, 'filter', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.add_comment()
+        self.assertFalse(Comment.objects.exists())
+
+    def test_reconcile_command_fixes_drift(self):
+        self.add_comment()
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7)
+        call_command('reconcile_comment_counts', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+
+class PopulateBlogTests(BlogTestCase):
+
+    def populate(self, *args):
+        call_command('populate_blog', '--posts=12', '--users=3', '--comments-per-post=4', *args, stdout=StringIO())
+
+    def snapshot(self):
+        return (
+            list(User.objects.order_by('username').values_list('username', 'password', 'date_joined')),
+            list(Post.objects.order_by('slug').values_list(
+                'slug', 'author__username', 'category__slug', 'content_digest', 'status',
+                'comment_count', 'created_at', 'updated_at', 'published_date',
+            )),
+            list(Comment.objects.order_by('post__slug', 'email').values_list(
+                'post__slug', 'email', 'content_digest', 'simhash', 'created_at',
+            )),
+        )
+
+    def seeded_run(self):
+        # Each run starts from an empty database
+        with transaction.atomic():
+            self.populate('--seed=7')
+            snapshot = self.snapshot()
+            transaction.set_rollback(True)
+        return snapshot
+
+    def test_seeded_runs_repeat(self):
+        first = self.seeded_run()
+        self.assertEqual(len(first[1]), 12)
+        self.assertEqual(first, self.seeded_run())
+
+    def test_updated_at_comes_from_the_generated_dates(self):
+        self.populate('--seed=3')
+        for post in Post.objects.all():
+            self.assertEqual(post.updated_at, post.published_date or post.created_at)
+
+    def test_rerun_adds_nothing(self):
+        self.populate('--seed=5')
+        before = self.snapshot()
+        self.populate('--seed=5')
+        self.assertEqual(self.snapshot(), before)
+
+
+class QueryBudgetTests(QueryBudgetMixin, BlogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Django', slug='django')
+        for i in range(20):
+            post = Post.objects.create(title=f'Post {i}', slug=f'post-{i}', content='Body', category=category)
+            Comment.objects.create(post=post, name='Reader', email='reader@example.com', content='Hi')
+        cls.post = post
+
+    def test_post_list(self):
+        self.assertWithinQueryBudget(self.client.get(reverse('post_list')))
+
+    def test_post_detail(self):
+        self.assertWithinQueryBudget(self.client.get(reverse('post_detail', args=[self.post.slug])))
+
+    def test_post_update_form(self):
+        self.assertWithinQueryBudget(self.client.get(reverse('post_update_form', args=[self.post.slug])))
+
+    def test_comment_post(self):
+        with self.assertNoLogs('myfirstproject.queries', level='WARNING'):
+            response = self.client.post(
+                reverse('post_detail', args=[self.post.slug]),
+                {'name': 'Reader', 'email': 'new@example.com', 'content': 'A fresh thought on this post.'},
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertWithinQueryBudget(response)
+        self.assertGreater(response.query_stats.count, get_budget('post_detail')['queries'])
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('post_list'))
+        self.assertRegex(response['Server-Timing'], r'^db;desc="1 queries";dur=[\d.]+')
+
+    @override_settings(QUERY_INSTRUMENTATION={'BUDGETS': {'post_list': {'queries': 0}}})
+    def test_over_budget_requests_are_logged(self):
+        with self.assertLogs('myfirstproject.queries', level='WARNING') as logs:
+            self.client.get(reverse('post_list'))
+        self.assertIn('blog_post', logs.output[0])
+
+
+class SqliteProfileTests(BlogTestCase):
+
+    def pragma(self, name):
+        with connections['default'].cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_init_command_is_applied(self):
+        self.assertIn('PRAGMA busy_timeout=5000', connections['default'].settings_dict['OPTIONS']['init_command'])
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -20000)
+        self.assertEqual(self.pragma('temp_store'), 2)
+
+    def test_default_profile_leaves_the_file_alone(self):
+        self.assertNotIn('journal_mode', settings.SQLITE_PRAGMAS)
+        self.assertEqual(sqlite.PRODUCTION_PRAGMAS['journal_mode'], 'WAL')
+
+
+class PageCacheTests(BlogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Django', slug='django')
+        cls.first = Post.objects.create(title='First', slug='first', content='Body', category=cls.category)
+        cls.second = Post.objects.create(title='Second', slug='second', content='Body')
+
+    def get_detail(self, post):
+        return self.client.get(reverse('post_detail', args=[post.slug]))
+
+    def test_second_request_is_served_from_cache_without_queries(self):
+        self.assertEqual(self.get_detail(self.first)['X-Page-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_detail(self.first)['X-Page-Cache'], 'hit')
+
+    def test_comment_only_evicts_its_own_post(self):
+        self.get_detail(self.first)
+        self.get_detail(self.second)
+        Comment.objects.create(post=self.first, name='Reader', email='reader@example.com', content='Hi')
+        self.assertEqual(self.get_detail(self.first)['X-Page-Cache'], 'miss')
+        self.assertEqual(self.get_detail(self.second)['X-Page-Cache'], 'hit')
+
+    def test_category_change_evicts_pages_that_show_it(self):
+        self.client.get(reverse('post_list'))
+        self.get_detail(self.second)
+        self.category.name = 'Renamed'
+        self.category.save()
+        response = self.client.get(reverse('post_list'))
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Renamed')
+        self.assertEqual(self.get_detail(self.second)['X-Page-Cache'], 'hit')
+
+    def test_head_uses_the_cached_page(self):
+        etag = self.get_detail(self.first)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.head(reverse('post_detail', args=[self.first.slug]))
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(response['ETag'], etag)
+        response = self.client.head(reverse('post_detail', args=[self.first.slug]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_pagination_links_use_the_clamped_page_size(self):
+        Post.objects.create(title='Third', slug='third', content='Body')
+        self.client.get(reverse('post_list'), {'page_size': '02'})
+        response = self.client.get(reverse('post_list'), {'page_size': '2'})
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, '&amp;page_size=2" rel="next"')
+        self.assertNotContains(response, 'page_size=02')
+
+    def test_status_filter_has_its_own_entry(self):
+        self.client.get(reverse('post_list'))
+        self.assertEqual(self.client.get(reverse('post_list'), {'status': 'draft'})['X-Page-Cache'], 'miss')
+
+    def test_cached_comment_form_gets_each_visitors_csrf_token(self):
+        self.get_detail(self.first)
+        client = Client(enforce_csrf_checks=True)
+        response = client.get(reverse('post_detail', args=[self.first.slug]))
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+        token = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', response.content).group(1).decode()
+        response = client.post(
+            reverse('post_detail', args=[self.first.slug]),
+            {'name': 'Reader', 'email': 'reader@example.com', 'content': 'Hello', 'csrfmiddlewaretoken': token},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_revalidation_with_etag_is_answered_without_queries(self):
+        response = self.get_detail(self.first)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertTrue(response['Last-Modified'])
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse('post_detail', args=[self.first.slug]), HTTP_IF_NONE_MATCH=response['ETag'],
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_detail_etag_is_weak_because_of_the_csrf_token(self):
+        self.assertTrue(self.get_detail(self.first)['ETag'].startswith('W/'))
+
+    def test_comment_changes_the_etag(self):
+        etag = self.get_detail(self.first)['ETag']
+        Comment.objects.create(post=self.first, name='Reader', email='reader@example.com', content='Hi')
+        response = self.client.get(reverse('post_detail', args=[self.first.slug]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(reverse('post_list'))['Last-Modified']
+        response = self.client.get(reverse('post_list'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_last_modified_moves_with_comments_and_deletions(self):
+        url = reverse('post_list')
+        later = time.time_ns() + 2_000_000_000
+        # HTTP dates have whole seconds; make each change land in a later one
+        for change in (
+            lambda: Comment.objects.create(post=self.first, name='Reader', email='reader@example.com', content='Hi'),
+            lambda: self.second.delete(),
+        ):
+            last_modified = self.client.get(url)['Last-Modified']
+            with mock.patch('blog.cache.time.time_ns', return_value=later):
+                change()
+            later += 2_000_000_000
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_api_revalidation(self):
+        url = reverse('posts_api')
+        etag = self.client.get(url)['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        comments_url = reverse('post_comments', args=[self.first.slug])
+        etag = self.client.get(comments_url)['ETag']
+        self.assertEqual(self.client.get(comments_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+@override_settings(BLOG_PAGE_CACHE={'ENABLED': False})
+class PostCardFragmentTests(BlogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            Post.objects.create(title=f'Post {i}', slug=f'post-{i}', content='Body')
+
+    def setUp(self):
+        super().setUp()
+        fragment_stats.reset()
+
+    def test_unchanged_cards_are_reused(self):
+        self.client.get(reverse('post_list'))
+        self.assertEqual(fragment_stats.snapshot()['misses'], 3)
+
+        post = Post.objects.get(slug='post-1')
+        post.title = 'Edited'
+        post.save()
+        response = self.client.get(reverse('post_list'))
+        self.assertContains(response, 'Edited')
+        self.assertEqual(fragment_stats.hits, 2)
+        self.assertEqual(fragment_stats.misses, 4)
+
+    def test_new_comment_refreshes_the_card_count(self):
+        self.client.get(reverse('post_list'))
+        post = Post.objects.get(slug='post-2')
+        Comment.objects.create(post=post, name='Reader', email='reader@example.com', content='Hi')
+        self.client.get(reverse('post_list'))
+        self.assertEqual(fragment_stats.misses, 4)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(BlogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.router = PrimaryReplicaRouter()
+
+    def allow_replica_reads(self):
+        token = allow_replica_reads()
+        self.addCleanup(reset_replica_reads, token)
+        # TestCase wraps every test in a transaction, which keeps reads on
+        # the primary; step outside it for the router
+        patcher = mock.patch.object(connections['default'], 'in_atomic_block', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_blog_reads_go_to_a_replica_and_writes_to_primary(self):
+        self.allow_replica_reads()
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertIsNone(self.router.db_for_read(User))
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'blog'))
+
+    def test_reads_outside_requests_use_the_primary(self):
+        # Commands and background threads never opted in
+        with mock.patch.object(connections['default'], 'in_atomic_block', False):
+            self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_reads_inside_a_transaction_use_the_primary(self):
+        token = allow_replica_reads()
+        try:
+            self.assertIsNone(self.router.db_for_read(Post))
+        finally:
+            reset_replica_reads(token)
+
+    def test_safe_requests_opt_in_and_pinned_ones_do_not(self):
+        seen = []
+
+        def view(request):
+            seen.append(replica_reads_allowed())
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(view)
+        factory = RequestFactory()
+        middleware(factory.get('/'))
+        pinned = factory.get('/')
+        pinned.COOKIES[PIN_COOKIE] = '1'
+        middleware(pinned)
+        middleware(factory.post('/'))
+        self.assertEqual(seen, [True, False, False])
+        self.assertFalse(replica_reads_allowed())
+
+    def test_post_sets_pin_cookie(self):
+        post = Post.objects.create(title='Pinned', slug='pinned', content='Body')
+        response = self.client.post(
+            reverse('post_detail', args=[post.slug]),
+            {'name': 'Reader', 'email': 'reader@example.com', 'content': 'Hello'},
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+class AsyncViewTests(BlogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(15):
+            cls.post = Post.objects.create(title=f'Post {i}', slug=f'post-{i}', content='Body')
+        Comment.objects.create(post=cls.post, name='Reader', email='reader@example.com', content='Async hello')
+
+    async def test_async_post_list_matches_sync(self):
+        request = AsyncRequestFactory().get('/blog/posts/', {'page_size': 5})
+        response = await async_views.post_list(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Post 14')
+        self.assertNotContains(response, 'Post 9')
+
+    async def test_async_post_detail(self):
+        request = AsyncRequestFactory().get(f'/blog/posts/{self.post.slug}/')
+        response = await async_views.post_detail(request, slug=self.post.slug)
+        self.assertContains(response, 'Async hello')
+
+    async def test_async_posts_api_pages_like_the_sync_one(self):
+        factory = AsyncRequestFactory()
+        data = json.loads((await async_views.posts_api(factory.get('/blog/api/posts/', {'page_size': 10}))).content)
+        sync_data = await sync_to_async(lambda: self.client.get(reverse('posts_api'), {'page_size': 10}).json())()
+        self.assertEqual(data, sync_data)
+        self.assertEqual(len(data['posts']), 10)
+        self.assertIsNotNone(data['next_cursor'])
+
+
+def make_image_upload(name='photo.jpg', size=(1200, 600)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'steelblue').save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ThumbnailTests(BlogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, BLOG_THUMBNAILS={'INLINE': True})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_post(self, **data):
+        form = PostForm(
+            {'title': 'Photo post', 'slug': 'photo-post', 'content': 'Body', 'status': 'draft', **data},
+            {'featured_image': make_image_upload()},
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        return form.save()
+
+    def test_thumbnail_is_generated_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            post = self.create_post()
+        # The request is done before any resizing happens; cards show the placeholder
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(post.thumbnail_url, static(thumbnails.THUMBNAIL_PLACEHOLDER))
+
+        callbacks[0]()
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail.name, thumbnails.thumbnail_name(post.featured_image.name))
+        with Image.open(post.thumbnail.path) as image:
+            self.assertEqual(image.size, (400, 200))
+
+    def test_unchanged_image_is_not_queued_again(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = self.create_post()
+        post.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            post.title = 'Renamed'
+            post.save()
+        self.assertEqual(callbacks, [])
+
+    def test_sources_with_the_same_stem_get_their_own_thumbnails(self):
+        names = {thumbnails.thumbnail_name(name) for name in ('photo.jpg', 'photo.png', 'uploads/photo.jpg')}
+        self.assertEqual(len(names), 3)
+        self.assertTrue(all(name.startswith('thumbnails/photo-') for name in names))
+
+    def test_stale_job_does_not_overwrite_newer_image(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            post = self.create_post()
+        self.assertFalse(thumbnails.finish(post.pk, 'an-older-upload.jpg', 'thumbnails/old.jpg'))
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail.name, '')
+
+    def test_broken_pool_is_replaced_and_the_job_can_be_queued_again(self):
+        key = ('thumbnail', 0, 'photo.jpg')
+        broken = mock.Mock(**{'submit.side_effect': BrokenProcessPool})
+        with mock.patch.object(workers, '_pool', broken), self.assertLogs('blog.workers', 'ERROR'):
+            self.assertFalse(workers.submit(key, print, (), print))
+            self.assertIsNone(workers._pool)
+        broken.shutdown.assert_called_once_with(wait=False)
+        self.assertNotIn(key, workers._pending)
+
+        with mock.patch.object(workers, '_pool', mock.Mock()):
+            self.assertTrue(workers.submit(key, print, (), print))
+        workers._pending.discard(key)
+
+    def test_post_card_shows_placeholder_until_ready(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            self.create_post(status='published')
+        response = self.client.get(reverse('post_list'))
+        self.assertContains(response, static(thumbnails.THUMBNAIL_PLACEHOLDER))
+
+
+class ResponsiveImageTests(BlogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root,
+            BLOG_THUMBNAILS={'ENABLED': False},
+            BLOG_IMAGE_VARIANTS={'INLINE': True, 'WIDTHS': (320, 640, 1280)},
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.post = Post.objects.create(
+            title='Photo', slug='photo', content='Body', featured_image=make_image_upload(size=(1000, 500)),
+        )
+
+    def test_srcset_lists_widths_up_to_the_original(self):
+        html = responsive_image(self.post.featured_image, alt='Photo')
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('type="image/webp"', html)
+        widths = re.findall(r'\.jpg (\d+)w', html)
+        self.assertEqual(widths, ['320', '640', '1000'])
+        self.assertIn('width="1000" height="500"', html)
+
+    def test_identical_uploads_share_variants(self):
+        other = Post.objects.create(
+            title='Same photo', slug='same-photo', content='Other', featured_image=make_image_upload(size=(1000, 500)),
+        )
+        first = variants.get_manifest(self.post.featured_image)
+        second = variants.get_manifest(other.featured_image)
+        self.assertNotEqual(self.post.featured_image.name, other.featured_image.name)
+        self.assertEqual(first['variants'], second['variants'])
+
+    def test_original_is_shown_while_variants_are_queued(self):
+        with override_settings(BLOG_IMAGE_VARIANTS={'INLINE': False}), mock.patch.object(variants.workers, 'submit') as submit:
+            html = responsive_image(self.post.featured_image, alt='Photo')
+        submit.assert_called_once()
+        self.assertIn(f'src="{self.post.featured_image.url}"', html)
+        self.assertNotIn('srcset', html)
+
+
+class MediaServingTests(BlogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.body = bytes(range(256)) * 4
+        with open(f'{media_root}/photo.jpg', 'wb') as handle:
+            handle.write(self.body)
+        self.url = '/media/photo.jpg'
+
+    def test_full_file_has_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.body)
+        self.assertEqual(response['Content-Length'], str(len(self.body)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_repeat_view_is_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_byte_range(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.body)}')
+        self.assertEqual(b''.join(response.streaming_content), self.body[10:20])
+
+    def test_stale_if_range_gets_the_whole_file(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=10-19', 'If-Range': '"old"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=5000-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.body)}')
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=-100', 1024), (924, 1023))
+        self.assertEqual(parse_range('bytes=1000-2000', 1024), (1000, 1023))
+        self.assertIsNone(parse_range('bytes=0-1,5-9', 1024))
+
+    def test_path_outside_media_root_is_not_found(self):
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/missing.jpg').status_code, 404)
+
+    @override_settings(MEDIA_SERVING={'MODE': 'x-accel'})
+    def test_x_accel_redirect_mode(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/photo.jpg')
+        self.assertEqual(response.content, b'')
+
+
+class StaticFilesTests(BlogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        settings_override = override_settings(STATIC_ROOT=static_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.static_root = static_root
+        self.css_url = static('css/style.css')
+
+    def test_collected_css_is_hashed_minified_and_compressed(self):
+        self.assertRegex(self.css_url, r'/static/css/style\.[0-9a-f]{12}\.css$')
+        path = os.path.join(self.static_root, self.css_url.removeprefix('/static/'))
+        with open(path) as handle:
+            self.assertNotIn('\n', handle.read())
+        self.assertTrue(os.path.exists(path + '.gz'))
+
+    def test_gzip_sibling_is_served_when_accepted(self):
+        response = self.client.get(self.css_url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        body = b''.join(response.streaming_content)
+        self.assertIn(b'{', gzip.decompress(body))
+
+    def test_identity_when_gzip_is_refused(self):
+        response = self.client.get(self.css_url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        etag = response['ETag']
+        self.assertNotEqual(etag, self.client.get(self.css_url, HTTP_ACCEPT_ENCODING='gzip')['ETag'])
+        self.assertEqual(self.client.get(self.css_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_compressed_siblings_are_not_served_directly(self):
+        self.assertEqual(self.client.get(self.css_url + '.gz').status_code, 404)
+
+    def test_unhashed_names_revalidate(self):
+        response = self.client.get('/static/css/style.css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+
+    def test_minify_css_keeps_strings(self):
+        css = '/* note */\na  >  b {\n  content: "a ;  b";\n  margin: 0 auto;\n}\n'
+        self.assertEqual(staticfiles.minify_css(css), 'a > b{content:"a ;  b";margin:0 auto}')
+
+    def test_minify_js_keeps_template_literals(self):
+        js = 'const a = "it\'s `";  \n\nconst b = `\n// kept\n  ${a}`;\n'
+        self.assertEqual(staticfiles.minify_js(js), 'const a = "it\'s `";\nconst b = `\n// kept\n  ${a}`;\n')
+
+    def test_hash_is_of_the_minified_file(self):
+        # A minifier change must change the immutable URL
+        path = os.path.join(self.static_root, self.css_url.removeprefix('/static/'))
+        with open(path, 'rb') as handle:
+            digest = hashlib.md5(handle.read(), usedforsecurity=False).hexdigest()[:12]
+        self.assertTrue(self.css_url.endswith(f'.{digest}.css'))
+
+    def test_vendor_assets_use_the_cdn_until_vendored(self):
+        html = self.client.get(reverse('post_list')).content.decode()
+        self.assertIn(staticfiles.VENDOR_ASSETS['bootstrap/bootstrap.min.css'], html)
+        # A fresh STATIC_ROOT: no manifest yet, so plain names
+        with override_settings(STATIC_VENDOR_ASSETS=True, STATIC_ROOT=tempfile.gettempdir()):
+            self.assertEqual(vendor_asset('inter/inter.css'), '/static/vendor/inter/inter.css')
+
+
+@override_settings(
+    RATE_LIMITS={'LIMITS': {'comment': {'ip': '3/m', 'email': '2/m'}, 'contact': {'ip': '1/h'}}},
+    BLOG_COMMENT_DUPLICATES={'ENABLED': False},
+)
+class RateLimitTests(BlogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.post = Post.objects.create(title='First', slug='first', content='Body')
+        self.url = reverse('post_detail', args=[self.post.slug])
+
+    def comment(self, email='reader@example.com', ip='127.0.0.1'):
+        return self.client.post(
+            self.url, {'name': 'Reader', 'email': email, 'content': 'Hi'}, REMOTE_ADDR=ip,
+        )
+
+    def test_email_bucket_runs_out_first(self):
+        self.assertEqual(self.comment().status_code, 302)
+        self.assertEqual(self.comment().status_code, 302)
+        with self.assertLogs('myfirstproject.ratelimit', 'WARNING'):
+            response = self.comment()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(Comment.objects.count(), 2)
+        # The same address is still allowed under another email
+        self.assertEqual(self.comment(email='other@example.com').status_code, 302)
+
+    def test_ip_bucket_covers_every_email(self):
+        for number in range(3):
+            self.assertEqual(self.comment(email=f'reader{number}@example.com').status_code, 302)
+        with self.assertLogs('myfirstproject.ratelimit', 'WARNING'):
+            self.assertEqual(self.comment(email='new@example.com').status_code, 429)
+        self.assertEqual(self.comment(email='new@example.com', ip='10.0.0.2').status_code, 302)
+
+    def test_reads_are_not_limited(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_contact_form(self):
+        data = {'name': 'Reader', 'email': 'reader@example.com', 'subject': 'Hi', 'message': 'Hello there'}
+        with mock.patch('builtins.print'):
+            self.client.post(reverse('contact'), data)
+        with self.assertLogs('myfirstproject.ratelimit', 'WARNING'):
+            self.assertEqual(self.client.post(reverse('contact'), data).status_code, 429)
+
+    def test_bucket_refills_over_time(self):
+        buckets = {'bucket': ratelimit.parse_rate('2/10s')}
+        self.assertEqual(ratelimit.take_token(cache, buckets, now=100), 0)
+        self.assertEqual(ratelimit.take_token(cache, buckets, now=100), 0)
+        self.assertEqual(ratelimit.take_token(cache, buckets, now=101), 4)
+        self.assertEqual(ratelimit.take_token(cache, buckets, now=105), 0)
+
+    def test_parse_rate(self):
+        self.assertEqual(ratelimit.parse_rate('10/15m'), (10, 10 / 900))
+        with self.assertRaises(ValueError):
+            ratelimit.parse_rate('ten per minute')
+
+
+class DuplicateCommentTests(BlogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = Post.objects.create(title='First', slug='first', content='Body')
+        cls.other_post = Post.objects.create(title='Second', slug='second', content='Body')
+        Comment.objects.create(
+            post=cls.post, name='Reader', email='reader@example.com',
+            content='Great article, thanks for writing it up!',
+        )
+
+    def form(self, content, email='reader@example.com', post=None):
+        return CommentForm({'name': 'Reader', 'email': email, 'content': content}, post=post or self.post)
+
+    def test_fingerprints_are_stored(self):
+        comment = Comment.objects.get()
+        self.assertEqual(len(comment.content_digest), 64)
+        self.assertEqual(comment.simhash, make_simhash(comment.content))
+
+    def test_exact_and_near_duplicates_are_rejected(self):
+        for content in ('great  article, THANKS for writing it up!', 'Great article... thanks for writing it up'):
+            form = self.form(content)
+            self.assertFalse(form.is_valid())
+            self.assertEqual(form.non_field_errors(), [duplicates.DUPLICATE_MESSAGE])
+
+    def test_other_comments_pass(self):
+        self.assertTrue(self.form('I disagree with the second section entirely.').is_valid())
+        self.assertTrue(self.form('Great article, thanks for writing it up!', email='other@example.com').is_valid())
+        self.assertTrue(self.form('Great article, thanks for writing it up!', post=self.other_post).is_valid())
+
+    def test_email_case_does_not_matter(self):
+        form = self.form('Great article, thanks for writing it up!', email='Reader@Example.com')
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.non_field_errors(), [duplicates.DUPLICATE_MESSAGE])
+        form = self.form('Something new and different to say here.', email='Reader@Example.com')
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['email'], 'reader@example.com')
+
+    def test_window_expires(self):
+        Comment.objects.update(created_at=timezone.now() - datetime.timedelta(hours=1))
+        self.assertTrue(self.form('Great article, thanks for writing it up!').is_valid())
+
+    def test_flood_of_one_text_across_posts(self):
+        text = 'Buy cheap watches at example dot com today'
+        for number in range(3):
+            Comment.objects.create(post=self.other_post, name='Bot', email=f'bot{number}@example.com', content=text)
+        form = self.form(text, email='bot9@example.com')
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.non_field_errors(), [duplicates.FLOOD_MESSAGE])
+
+    def test_check_uses_two_indexed_queries(self):
+        with self.assertNumQueries(2):
+            self.form('Something new and different to say here.').is_valid()
+
+    def test_posting_a_duplicate_shows_the_error(self):
+        response = self.client.post(
+            reverse('post_detail', args=[self.post.slug]),
+            {'name': 'Reader', 'email': 'reader@example.com', 'content': 'Great article, thanks for writing it up!'},
+        )
+        self.assertContains(response, duplicates.DUPLICATE_MESSAGE)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_simhash_distance(self):
+        first = make_simhash('the quick brown fox jumps over the lazy dog')
+        self.assertLessEqual(hamming_distance(first, make_simhash('The quick brown fox jumps over the lazy dog!')), 0)
+        self.assertGreater(hamming_distance(first, make_simhash('an entirely unrelated remark about databases')), 3)
+
+
+class MediaCleanupTests(BlogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, BLOG_MEDIA_CLEANUP={'INLINE': True})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_post(self, slug='photo'):
+        return Post.objects.create(title=slug, slug=slug, content=slug, featured_image=make_image_upload())
+
+    def test_deleting_a_post_deletes_its_image_after_commit(self):
+        post = self.create_post()
+        path = post.featured_image.path
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('post_delete', args=[post.slug]))
+        self.assertFalse(os.path.exists(path))
+
+    def test_replaced_image_is_deleted(self):
+        post = Post.objects.get(pk=self.create_post().pk)
+        old_path = post.featured_image.path
+        form = PostForm(
+            {'title': 'photo', 'slug': 'photo', 'content': 'photo', 'status': 'draft'},
+            {'featured_image': make_image_upload('new.jpg')}, instance=post,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            form.save()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(post.featured_image.path))
+
+    def test_files_still_in_use_are_kept(self):
+        post = self.create_post()
+        Post.objects.create(title='Copy', slug='copy', content='Copy', featured_image=post.featured_image.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, post.featured_image.name)))
+        self.assertIn('fallback.png', media_cleanup.protected_names())
+
+    def test_sweep_media_removes_only_old_orphans(self):
+        post = self.create_post()
+        old = time.time() - 7200
+        for name in ('orphan.jpg', 'fresh.jpg'):
+            path = os.path.join(self.media_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as handle:
+                handle.write(b'x' * 100)
+            if name != 'fresh.jpg':
+                os.utime(path, (old, old))
+        os.utime(post.featured_image.path, (old, old))
+
+        out = StringIO()
+        call_command('sweep_media', stdout=out)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'orphan.jpg')))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, 'fresh.jpg')))
+        self.assertTrue(os.path.exists(post.featured_image.path))
+        self.assertIn('Found 1 orphans. Reclaimed 100 bytes', out.getvalue())
+
+    def test_sweep_media_removes_variants_of_deleted_posts(self):
+        kept = self.create_post('kept')
+        deleted = Post.objects.create(
+            title='gone', slug='gone', content='gone', featured_image=make_image_upload('gone.jpg', size=(800, 400)),
+        )
+        folders = {}
+        for post in (kept, deleted):
+            manifest = imaging.render_variants(post.featured_image.path, self.media_root, 'variants', (320,))
+            folders[post.slug] = os.path.join(self.media_root, os.path.dirname(manifest['variants'][0]['jpeg']))
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted.delete()
+        old = time.time() - 7200
+        for directory, _, files in os.walk(self.media_root):
+            for name in files:
+                os.utime(os.path.join(directory, name), (old, old))
+
+        call_command('sweep_media', stdout=StringIO())
+        self.assertTrue(os.path.exists(os.path.join(folders['kept'], 'manifest.json')))
+        self.assertFalse(os.path.exists(folders['gone']))
+        self.assertFalse(os.path.exists(os.path.dirname(folders['gone'])))
+
+    def test_reference_check_reads_the_primary(self):
+        post = self.create_post()
+        # A router sending reads to a replica that doesn't exist would fail
+        with mock.patch.object(PrimaryReplicaRouter, 'db_for_read', return_value='replica'):
+            self.assertEqual(media_cleanup.referenced_names([post.featured_image.name]), {post.featured_image.name})
+
+
+@override_settings(BLOG_EXPORT_BATCH_SIZE=10)
+class PostStreamTests(BlogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='News', slug='news')
+        for i in range(25):
+            Post.objects.create(
+                title=f'Post {i}', slug=f'post-{i}', content='Body',
+                status='published' if i % 2 else 'draft', category=cls.category if i < 5 else None,
+            )
+        Post.objects.filter(slug='post-0').update(created_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+
+    def stream(self, **params):
+        response = self.client.get(reverse('posts_stream'), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_pages_through_every_post(self):
+        # One query per batch of 10
+        with self.assertNumQueries(3):
+            response, body = self.stream()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        ids = [json.loads(line)['id'] for line in body.splitlines()]
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(len(set(ids)), 25)
+
+    def test_json_array(self):
+        _, body = self.stream(format='json', status='published')
+        posts = json.loads(body)
+        self.assertEqual(len(posts), 12)
+        self.assertTrue(all(post['status'] == 'published' for post in posts))
+
+    def test_exports_the_full_body(self):
+        Post.objects.filter(slug='post-1').update(content='x' * 1000)
+        _, body = self.stream()
+        post = next(row for row in map(json.loads, body.splitlines()) if row['slug'] == 'post-1')
+        self.assertEqual(post['content'], 'x' * 1000)
+        self.assertNotIn('excerpt', post)
+        self.assertEqual(post['updated_at'], Post.objects.get(slug='post-1').updated_at.isoformat())
+
+    def test_category_and_date_filters(self):
+        _, body = self.stream(category='news', since='2021-01-01')
+        self.assertEqual(len(body.splitlines()), 4)
+        _, body = self.stream(until='2020-01-01')
+        self.assertEqual([json.loads(line)['slug'] for line in body.splitlines()], ['post-0'])
+
+    def test_bad_filters_are_rejected(self):
+        self.assertEqual(self.client.get(reverse('posts_stream'), {'since': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('posts_stream'), {'format': 'xml'}).status_code, 400)
+
+
+class PostStoreTests(BlogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'posts.json')
+        self.write([
+            {'id': 1, 'title': 'Old', 'published_date': '2025-03-27T10:00:00'},
+            {'id': 2, 'title': 'New', 'published_date': '2025-03-29T09:15:00'},
+            {'id': 3, 'title': 'Middle', 'published_date': '2025-03-28T11:30:00'},
+        ])
+
+    def write(self, posts, mtime=None):
+        with open(self.path, 'w') as handle:
+            json.dump(posts, handle, indent=2)
+        if mtime:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_parsed_once_and_sorted_newest_first(self):
+        store = post_store.JsonPostStore(self.path)
+        index = store.load()
+        self.assertIs(store.load(), index)
+        self.assertEqual([post['id'] for post in index], [2, 3, 1])
+        self.assertEqual(index.get(3)['title'], 'Middle')
+        self.assertIsNone(index.get(99))
+
+    def test_reloads_when_the_file_changes(self):
+        store = post_store.JsonPostStore(self.path)
+        store.load()
+        self.write([{'id': 4, 'title': 'Only', 'published_date': '2025-04-01T00:00:00'}], mtime=time.time() + 10)
+        self.assertEqual([post['id'] for post in store.load()], [4])
+
+    def test_streaming_parser_matches_json_load(self):
+        streamed = post_store.JsonPostStore(self.path, streaming_bytes=0).load()
+        self.assertEqual(streamed.posts, post_store.JsonPostStore(self.path).load().posts)
+        with open(self.path) as handle:
+            items = list(post_store.iter_json_array(handle, chunk_size=7))
+        self.assertEqual(len(items), 3)
+        self.assertEqual(list(post_store.iter_json_array(StringIO('[1, 22 ,333]'), chunk_size=1)), [1, 22, 333])
+
+    def test_date_range(self):
+        index = post_store.JsonPostStore(self.path).load()
+        posts = index.between('2025-03-28', '2025-03-29T23:59:59')
+        self.assertEqual([post['id'] for post in posts], [2, 3])
+        self.assertEqual([post['id'] for post in index.between(end='2025-03-28')], [1])
+
+    def test_load_posts_reads_the_project_file(self):
+        posts = views.load_posts()
+        self.assertEqual([post['id'] for post in posts], [3, 2, 1])
+
+
+class SamplePostDetailTests(BlogTestCase):
+
+    def test_lookup_by_id(self):
+        response = self.client.get('/blog/posts/2/')
+        self.assertEqual(response.json()['title'], 'Blog Post 2')
+
+    def test_unknown_id_is_not_found(self):
+        self.assertEqual(self.client.get('/blog/posts/999/').status_code, 404)
+
+    def test_index_is_sorted_by_date(self):
+        self.assertEqual([post['id'] for post in views.sample_posts], [3, 2, 1])
+
+    def test_revalidation(self):
+        etag = self.client.get('/blog/posts/2/')['ETag']
+        self.assertEqual(self.client.get('/blog/posts/2/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
@@ -0,0 +1,110 @@
+"""
+Thumbnails cut from Post.featured_image in the background.
+
+Saving a post with a new featured image queues a resize job once the
+transaction commits (see blog.signals). The job runs in the blog.workers
+process pool, so the request returns straight away and a big photo never
+holds a web worker; until the job finishes the post has no thumbnail and
+cards show THUMBNAIL_PLACEHOLDER. When it finishes, the post's thumbnail is
+pointed at the new file and its cached pages are invalidated.
+
+Thumbnails are named after their source image's full storage name, so a
+post whose thumbnail name matches its featured image is up to date and two
+uploads never share a thumbnail. The workers write through
+the storage's local path(), which limits this to FileSystemStorage.
+"""
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import cache, imaging, media_cleanup, workers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    # Resize in the calling thread instead of the pool (tests, scripts)
+    'INLINE': False,
+    'SIZE': (400, 200),
+    'QUALITY': 82,
+    'DIRECTORY': 'thumbnails',
+}
+
+# Static file shown on cards while a post has no thumbnail
+THUMBNAIL_PLACEHOLDER = 'img/thumbnail-placeholder.svg'
+
+# featured_image's default; not worth a thumbnail
+FALLBACK_IMAGE = 'fallback.png'
+
+
+def thumbnail_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'BLOG_THUMBNAILS', {})}
+
+
+def thumbnail_name(source_name, config=None):
+    """
+    The storage name of the thumbnail generated from `source_name`. The stem
+    keeps it readable; the hash of the whole name tells photo.jpg, photo.png
+    and uploads/photo.jpg apart.
+    """
+    config = config or thumbnail_settings()
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    digest = hashlib.blake2b(source_name.encode('utf-8'), digest_size=6).hexdigest()
+    width, height = config['SIZE']
+    return f"{config['DIRECTORY']}/{stem}-{digest}-{width}x{height}.jpg"
+
+
+def needs_thumbnail(post):
+    source = post.featured_image.name
+    if not source or source == FALLBACK_IMAGE:
+        return False
+    return post.thumbnail.name != thumbnail_name(source)
+
+
+def schedule(post):
+    """Queue a thumbnail for `post`'s current featured image."""
+    config = thumbnail_settings()
+    if not config['ENABLED'] or not needs_thumbnail(post):
+        return
+
+    source = post.featured_image.name
+    target = thumbnail_name(source, config)
+    job = (
+        post.featured_image.storage.path(source),
+        post.thumbnail.storage.path(target),
+        tuple(config['SIZE']),
+        config['QUALITY'],
+    )
+
+    if config['INLINE']:
+        try:
+            imaging.render_thumbnail(*job)
+        except Exception:
+            logger.exception('Could not make a thumbnail of %s for post %s', source, post.pk)
+        else:
+            finish(post.pk, source, target)
+        return
+
+    workers.submit(
+        ('thumbnail', post.pk, source), imaging.render_thumbnail, job,
+        lambda _: finish(post.pk, source, target),
+    )
+
+
+def finish(pk, source, target):
+    """Point the post at its new thumbnail, unless its image changed meanwhile."""
+    from .models import Post
+
+    posts = Post.objects.filter(pk=pk, featured_image=source)
+    previous = posts.values_list('thumbnail', flat=True).first()
+    # update() skips Post.save() and the signals: no re-queue, no digest work.
+    # Bumping updated_at retires the post's cached card fragment.
+    updated = posts.update(thumbnail=target, updated_at=timezone.now())
+    if updated:
+        cache.invalidate('post-list', f'post:{pk}')
+        if previous != target:
+            media_cleanup.delete_later(previous)
+    return bool(updated)
@@ -1,14 +1,22 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
+
+# Read-only views run async when BLOG_ASYNC_VIEWS is on (see blog.async_views)
+read_views = async_views if settings.BLOG_ASYNC_VIEWS else views
 
 urlpatterns = [
     path('hello/', views.hello_blog, name='hello_blog'),
     path('feedback/', views.submit_feedback, name='submit_feedback'),
     path('posts/<int:post_id>/', views.get_post_detail, name='post_detail'),
-    path('posts/', views.post_list, name='post_list'),
+    path('posts/', read_views.post_list, name='post_list'),
+    path('api/posts/', read_views.posts_api, name='posts_api'),
+    path('api/posts/stream/', views.posts_stream, name='posts_stream'),
+    path('search/', views.post_search, name='post_search'),
     path('posts/create/', views.post_create, name='post_create'),
-    path('posts/<slug:slug>/', views.post_detail, name='post_detail'),
+    path('posts/<slug:slug>/', read_views.post_detail, name='post_detail'),
+    path('posts/<slug:slug>/comments/', read_views.post_comments, name='post_comments'),
     path('posts/<slug:slug>/update/', views.post_update, name='post_update'),
     path('posts/<slug:slug>/delete/', views.post_delete, name='post_delete'),
 
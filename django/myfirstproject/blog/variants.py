@@ -0,0 +1,95 @@
+"""
+Responsive copies of uploaded images, for srcset.
+
+Each image gets a JPEG and a WebP copy at several widths (see
+blog.imaging.render_variants), so browsers download the smallest one that
+fills the slot instead of the full-size upload. Variants are stored by the
+content hash of the original, which makes identical uploads share them.
+
+The first time an image is rendered its variants are queued on the
+blog.workers pool and the page falls back to the original; the finished
+manifest is cached under the file's name, size and mtime, and the pages of
+posts using the image are invalidated so they pick it up.
+"""
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import cache, imaging, workers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    # Generate in the calling thread instead of the pool (tests, scripts)
+    'INLINE': False,
+    'WIDTHS': (320, 640, 960, 1280, 1920),
+    'QUALITY': 82,
+    'WEBP_QUALITY': 80,
+    'DIRECTORY': 'variants',
+    'ALIAS': 'default',
+}
+
+MANIFEST_PREFIX = 'blog:variants'
+
+
+def variant_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'BLOG_IMAGE_VARIANTS', {})}
+
+
+def _manifest_key(name, stat):
+    # A re-upload under the same name changes size or mtime, and so the key
+    name_hash = hashlib.blake2b(name.encode(), digest_size=8).hexdigest()
+    return f'{MANIFEST_PREFIX}:{name_hash}:{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def get_manifest(image):
+    """
+    The variant manifest of an ImageField file, or None if there isn't one
+    yet, in which case it is queued.
+    """
+    config = variant_settings()
+    if not config['ENABLED'] or not image:
+        return None
+    storage = image.storage
+    try:
+        path = storage.path(image.name)
+        key = _manifest_key(image.name, os.stat(path))
+    except (NotImplementedError, OSError):
+        # Not on the local filesystem, or missing: serve the original
+        return None
+
+    manifest = caches[config['ALIAS']].get(key)
+    if manifest is None:
+        manifest = schedule(image.name, path, storage.location, key, config)
+    return manifest
+
+
+def schedule(name, path, root, key, config):
+    job = (
+        path, root, config['DIRECTORY'], tuple(config['WIDTHS']),
+        config['QUALITY'], config['WEBP_QUALITY'],
+    )
+    if config['INLINE']:
+        try:
+            manifest = imaging.render_variants(*job)
+        except Exception:
+            logger.exception('Could not make variants of %s', name)
+            return None
+        store(name, key, manifest, config)
+        return manifest
+
+    workers.submit(('variants', key), imaging.render_variants, job, lambda manifest: store(name, key, manifest, config))
+    return None
+
+
+def store(name, key, manifest, config):
+    from .models import Post
+
+    caches[config['ALIAS']].set(key, manifest, None)
+    # Pages cached while the variants were missing still show the original
+    post_ids = Post.objects.filter(featured_image=name).values_list('pk', flat=True)
+    cache.invalidate(*(f'post:{pk}' for pk in post_ids))
@@ -1,18 +1,25 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse
+from django.http import HttpResponse, Http404, StreamingHttpResponse
 
-import os
+import datetime
 from django.conf import settings
 
 
 from django.http import JsonResponse
 from django.views.generic import ListView
+from django.utils import dateformat, timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import localtime
 import json
 
 from .models import Post, Category, Comment
 
 from .forms import CommentForm, PostForm, CategoryForm, ContactForm
+from .pagination import KeysetPaginator, InvalidCursor, get_page_size
+from . import post_store, search
+from .cache import cached_page, cacheable_csrf, tag_page
 from django.contrib import messages
+from myfirstproject.ratelimit import rate_limit
 
 # Create your views here.
 
@@ -57,8 +64,14 @@ posts = [
 #     return JsonResponse(context)
 
 
+# Indexed by id once, at import (and so again when the dev server reloads)
+sample_posts = post_store.PostIndex(posts, date_of=post_store.date_posted)
+
+
 def get_post_detail(request, post_id):
-    post = next(post for post in posts if post['id'] == post_id)
+    post = sample_posts.get(post_id)
+    if post is None:
+        raise Http404("No post with that id.")
     return JsonResponse(post)
 
 
@@ -92,27 +105,205 @@ def load_posts():
     """
         Utility function to load posts from the JSON file.
         Returns:
-            list: A list of dictionaries representing posts.
+            tuple: The posts as dictionaries, newest first. The result is
+            shared between callers (see blog.post_store), so don't modify it.
         """
-    json_file_path = os.path.join(settings.BASE_DIR, 'data\posts.json')
+    return post_store.get_store().load().posts
 
-    with open(json_file_path, 'r') as file:
-        posts = json.load(file)
 
-        posts.sort(key=lambda x: x['published_date'], reverse=True)
+def get_status_filter(request):
+    status = request.GET.get('status', '')
+    return status if status in dict(Post.STATUS_CHOICES) else ''
 
-        return posts
 
+def post_list_cache_key(request):
+    return (request.GET.get('cursor', ''), get_page_size(request), get_status_filter(request))
 
+
+@cached_page(post_list_cache_key)
 def post_list(request):
-    posts = Post.objects.all()
+    posts = Post.objects.for_list()
+    status = get_status_filter(request)
+    if status:
+        posts = posts.filter(status=status)
+
+    paginator = KeysetPaginator(posts, page_size=get_page_size(request))
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        raise Http404("Invalid page cursor.")
+
+    tag_page(request, 'post-list')
+    for post in page:
+        tag_page(request, f'post:{post.pk}', f'category:{post.category_id}' if post.category_id else None)
+
     context = {
-        'posts': posts,
+        'posts': page.object_list,
+        'page': page,
+        'status': status,
         'title': 'Blog Posts'
     }
     return render(request, 'posts/post_list.html', context)
 
 
+def post_to_dict(post):
+    """JSON shape of a post loaded with Post.objects.for_list()."""
+    return {
+        'id': post.id,
+        'title': post.title,
+        'slug': post.slug,
+        'status': post.status,
+        'author': post.author.username if post.author_id else None,
+        'category': post.category.name if post.category_id else None,
+        'excerpt': post.excerpt,
+        'comment_count': post.comment_count,
+        'created_at': post.created_at.isoformat(),
+        'published_date': post.published_date.isoformat() if post.published_date else None,
+    }
+
+
+def post_to_export_dict(post):
+    """JSON shape of a post loaded with Post.objects.for_export()."""
+    return {
+        'id': post.id,
+        'title': post.title,
+        'slug': post.slug,
+        'status': post.status,
+        'author': post.author.username if post.author_id else None,
+        'category': post.category.name if post.category_id else None,
+        'content': post.content,
+        'comment_count': post.comment_count,
+        'created_at': post.created_at.isoformat(),
+        'updated_at': post.updated_at.isoformat(),
+        'published_date': post.published_date.isoformat() if post.published_date else None,
+    }
+
+
+@cached_page(post_list_cache_key)
+def posts_api(request):
+    """
+    JSON page of posts, newest first, with the same ?cursor=, ?page_size=
+    and ?status= parameters as post_list.
+    """
+    posts = Post.objects.for_list()
+    status = get_status_filter(request)
+    if status:
+        posts = posts.filter(status=status)
+
+    try:
+        page = KeysetPaginator(posts, page_size=get_page_size(request)).page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+    tag_page(request, 'post-list')
+    for post in page:
+        tag_page(request, f'post:{post.pk}', f'category:{post.category_id}' if post.category_id else None)
+    return JsonResponse({
+        'posts': [post_to_dict(post) for post in page],
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+    })
+
+
+class ExportFilterError(ValueError):
+    """A bad filter parameter on the posts export."""
+
+
+def parse_export_date(value, end=False):
+    """
+    An aware datetime from an ISO date or datetime. A bare date covers the
+    whole day, so as an upper bound (`end`) it means midnight after it.
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ExportFilterError(f'Invalid date: {value!r}.')
+        parsed = datetime.datetime.combine(day + datetime.timedelta(days=int(end)), datetime.time())
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+def export_queryset(request):
+    """Posts for the export, filtered by ?status=, ?category=<slug>, ?since= and ?until=."""
+    posts = Post.objects.for_export()
+    status = request.GET.get('status')
+    if status:
+        if status not in dict(Post.STATUS_CHOICES):
+            raise ExportFilterError(f'Invalid status: {status!r}.')
+        posts = posts.filter(status=status)
+    if request.GET.get('category'):
+        posts = posts.filter(category__slug=request.GET['category'])
+    try:
+        if request.GET.get('since'):
+            posts = posts.filter(created_at__gte=parse_export_date(request.GET['since']))
+        if request.GET.get('until'):
+            until = request.GET['until']
+            lookup = 'created_at__lt' if parse_datetime(until) is None else 'created_at__lte'
+            posts = posts.filter(**{lookup: parse_export_date(until, end=True)})
+    except ValueError as error:
+        raise ExportFilterError(str(error))
+    return posts
+
+
+def iter_in_batches(queryset, batch_size):
+    """
+    Yield every row of `queryset`, newest first, fetching `batch_size` rows
+    per query. Each batch is a keyset query of its own, so no read cursor
+    stays open on the database while the client is slow to read.
+    """
+    paginator = KeysetPaginator(queryset, page_size=batch_size)
+    cursor = None
+    while True:
+        page = paginator.page(cursor)
+        yield from page
+        if not page.has_next():
+            return
+        cursor = page.next_cursor
+
+
+def posts_stream(request):
+    """
+    Every post matching the filters, as NDJSON (one object per line) or,
+    with ?format=json, one JSON array. The body is written as rows arrive,
+    so memory use is one batch however many posts match.
+    """
+    output = request.GET.get('format', 'ndjson')
+    if output not in ('ndjson', 'json'):
+        return JsonResponse({'error': 'format must be ndjson or json.'}, status=400)
+    try:
+        queryset = export_queryset(request)
+    except ExportFilterError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    rows = iter_in_batches(queryset, getattr(settings, 'BLOG_EXPORT_BATCH_SIZE', 1000))
+    encode = json.JSONEncoder(separators=(',', ':')).encode
+    if output == 'ndjson':
+        body = (encode(post_to_export_dict(post)) + '\n' for post in rows)
+        content_type = 'application/x-ndjson'
+    else:
+        body = json_array(encode(post_to_export_dict(post)) for post in rows)
+        content_type = 'application/json'
+    return StreamingHttpResponse(body, content_type=content_type)
+
+
+def json_array(items):
+    yield '['
+    for position, item in enumerate(items):
+        yield item if position == 0 else ',' + item
+    yield ']'
+
+
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    results = search.search_posts(query, limit=get_page_size(request)) if query else []
+    context = {
+        'query': query,
+        'results': results,
+        'title': f'Search: {query}' if query else 'Search Posts'
+    }
+    return render(request, 'posts/post_search.html', context)
+
+
 def post_create(request):
     status_choices = Post.STATUS_CHOICES
     if request.method == 'POST':
@@ -150,15 +341,7 @@ def post_delete(request, slug):
     post = get_object_or_404(Post, slug=slug)
 
     if request.method == 'POST':
-        # Delete the image files if they exist and aren't the default
-        if post.featured_image and post.featured_image.name != 'fallback.png':
-            if os.path.isfile(post.featured_image.path):
-                os.remove(post.featured_image.path)
-        
-        if post.thumbnail and post.thumbnail.name != 'fallback.png':
-            if os.path.isfile(post.thumbnail.path):
-                os.remove(post.thumbnail.path)
-                
+        # Its image files are removed after the response (blog.media_cleanup)
         post.delete()
         messages.success(request, "Post deleted successfully!")
         return redirect('post_list')
@@ -231,12 +414,13 @@ def post_update_form(request, slug):
 
 
 # Comment Form - Create Comment on post detail page
+@rate_limit('comment')
+@cached_page(lambda request, slug: (slug,))
 def post_detail(request, slug):
-    post = get_object_or_404(Post, slug=slug)
-    comments = post.comments.all()
+    post = get_object_or_404(Post.objects.for_detail(), slug=slug)
 
     if request.method == 'POST':
-        comment_form = CommentForm(request.POST)
+        comment_form = CommentForm(request.POST, post=post)
         if comment_form.is_valid():
             comment = comment_form.save(commit=False)
             comment.post = post
@@ -246,7 +430,53 @@ def post_detail(request, slug):
     else:
         comment_form = CommentForm()
     
-    return render(request, 'posts/post_detail.html', {'post': post, 'comments': comments, 'comment_form': comment_form})
+    # Only the newest page of comments is rendered; the rest come from post_comments
+    comments_page = comment_paginator(post).page()
+    tag_page(request, f'post:{post.pk}', f'category:{post.category_id}' if post.category_id else None)
+    context = {
+        'post': post,
+        'comments': comments_page.object_list,
+        'comments_page': comments_page,
+        'comment_form': comment_form,
+        **cacheable_csrf(request),
+    }
+    return render(request, 'posts/post_detail.html', context)
+
+
+def comment_paginator(post):
+    return KeysetPaginator(Comment.objects.for_post(post), page_size=settings.BLOG_COMMENTS_PAGE_SIZE)
+
+
+def post_comments_cache_key(request, slug):
+    return (slug, request.GET.get('cursor', ''))
+
+
+@cached_page(post_comments_cache_key)
+def post_comments(request, slug):
+    """
+    JSON page of a post's comments, newest first. Pass the `next_cursor`
+    from the previous response as ?cursor= to get the following page.
+    """
+    post = get_object_or_404(Post.objects.only('id'), slug=slug)
+    try:
+        page = comment_paginator(post).page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+    tag_page(request, f'post:{post.pk}')
+
+    comments = [comment_to_dict(comment) for comment in page]
+    return JsonResponse({'comments': comments, 'next_cursor': page.next_cursor})
+
+
+def comment_to_dict(comment):
+    return {
+        'id': comment.id,
+        'name': comment.name,
+        'content': comment.content,
+        'created_at': comment.created_at.isoformat(),
+        'created_display': dateformat.format(localtime(comment.created_at), 'F d, Y g:i A'),
+    }
 
 
 def catagory_create(request):
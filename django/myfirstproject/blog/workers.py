@@ -0,0 +1,95 @@
+"""
+The process pool that image jobs (blog.thumbnails, blog.variants) run in.
+
+Jobs are functions from blog.imaging, which take plain paths so they can be
+pickled to a spawned worker. Their callbacks run on the pool's management
+thread in this process, with a database connection of their own that is
+closed after each callback.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_lock = threading.Lock()
+# Keys of queued or running jobs, so the same work is never queued twice
+_pending = set()
+
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            # spawn, not fork: a forked copy of a threaded web worker can
+            # inherit held locks and open database handles
+            _pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'BLOG_IMAGE_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def submit(key, function, args, on_done):
+    """
+    Run function(*args) in the pool, then on_done(result) here.
+
+    Returns False without queueing anything when a job with the same key
+    is already queued or running, or when the pool refuses the job. This
+    runs in on_commit callbacks, after the request's work is saved, so a
+    refusal is logged rather than raised.
+    """
+    with _lock:
+        if key in _pending:
+            return False
+        _pending.add(key)
+    pool = _get_pool()
+    try:
+        future = pool.submit(function, *args)
+    except Exception as exc:
+        logger.exception('Could not queue image job %r', key)
+        with _lock:
+            _pending.discard(key)
+        if isinstance(exc, BrokenProcessPool):
+            _discard_pool(pool)
+        return False
+    future.add_done_callback(lambda future: _job_done(key, pool, future, on_done))
+    return True
+
+
+def _discard_pool(pool):
+    """Drop a pool whose worker died; the next job starts a new one."""
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _job_done(key, pool, future, on_done):
+    try:
+        on_done(future.result())
+    except BrokenProcessPool:
+        logger.exception('Image job %r failed', key)
+        _discard_pool(pool)
+    except Exception:
+        logger.exception('Image job %r failed', key)
+    finally:
+        with _lock:
+            _pending.discard(key)
+        connection.close()
+
+
+def shutdown(wait=True):
+    """Stop the pool, by default after finishing the queued jobs."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
@@ -0,0 +1,159 @@
+"""
+Serving of user uploads under MEDIA_URL.
+
+Replaces django.conf.urls.static.static(), which reads every file through
+Python on every request and sends no validators, so browsers download a
+1.5 MB photo again on each visit. Here:
+
+- Every response carries a strong ETag (size and mtime) and Last-Modified,
+  so repeat views are answered with a 304 and no body.
+- `Range: bytes=...` requests get a 206 with just those bytes, which lets
+  browsers resume downloads and seek in video.
+- Whole files go out through FileResponse, which hands the open file to
+  the server's wsgi.file_wrapper (sendfile() under gunicorn/uWSGI).
+- In 'x-accel' or 'x-sendfile' mode the body is left to nginx or Apache:
+  Django only checks the path and answers the conditional request.
+
+Settings live in MEDIA_SERVING, see DEFAULT_SETTINGS.
+"""
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+DEFAULT_SETTINGS = {
+    # 'python', 'x-accel' (nginx) or 'x-sendfile' (Apache mod_xsendfile)
+    'MODE': 'python',
+    # Internal nginx location that aliases MEDIA_ROOT, for 'x-accel'
+    'X_ACCEL_PREFIX': '/protected-media/',
+    # Browsers revalidate (cheaply, with a 304) after this many seconds
+    'MAX_AGE': 3600,
+    # Files under these prefixes never change once written (their names hold
+    # a content hash), so browsers may keep them for a year without asking
+    'IMMUTABLE_PREFIXES': ('variants/',),
+    'CHUNK_SIZE': 64 * 1024,
+}
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def media_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'MEDIA_SERVING', {})}
+
+
+def make_etag(file_stat):
+    return quote_etag(f'{file_stat.st_size:x}-{file_stat.st_mtime_ns:x}')
+
+
+def parse_range(header, size):
+    """
+    The (start, end) byte positions, both inclusive, asked for by a Range
+    header; None to send the whole file; or 'unsatisfiable'.
+
+    Only single ranges are honoured. Servers may answer a multi-range
+    request with the full file, which is what browsers fetching images do
+    anyway.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return 'unsatisfiable'
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'unsatisfiable'
+    return start, end
+
+
+def _read_range(path, start, length, chunk_size):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _set_validators(response, name, etag, last_modified, config):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if name.startswith(tuple(config['IMMUTABLE_PREFIXES'])):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = f"public, max-age={config['MAX_AGE']}"
+    return response
+
+
+@require_safe
+def serve(request, path):
+    config = media_settings()
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        file_stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404('No such file.')
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404('No such file.')
+
+    name = os.path.relpath(full_path, settings.MEDIA_ROOT).replace(os.sep, '/')
+    etag = make_etag(file_stat)
+    last_modified = int(file_stat.st_mtime)
+
+    # 304 Not Modified / 412 Precondition Failed, before touching the file
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return _set_validators(response, name, etag, last_modified, config)
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    if config['MODE'] in ('x-accel', 'x-sendfile'):
+        response = HttpResponse(content_type=content_type)
+        if config['MODE'] == 'x-accel':
+            response['X-Accel-Redirect'] = config['X_ACCEL_PREFIX'] + name
+        else:
+            response['X-Sendfile'] = full_path
+        return _set_validators(response, name, etag, last_modified, config)
+
+    size = file_stat.st_size
+    byte_range = None
+    range_header = request.headers.get('Range')
+    # If-Range: only send part of the file if it is still the version the
+    # client has the other parts of
+    if range_header and request.headers.get('If-Range', etag) == etag:
+        byte_range = parse_range(range_header, size)
+
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _read_range(full_path, start, length, config['CHUNK_SIZE']),
+            status=206, content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+    else:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    return _set_validators(response, name, etag, last_modified, config)
@@ -0,0 +1,128 @@
+"""
+Project-wide middleware.
+"""
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('myfirstproject.queries')
+
+DEFAULT_SETTINGS = {
+    'SERVER_TIMING': True,
+    'LOG_OVER_BUDGET': True,
+    'DEFAULT_BUDGET': {'queries': 20, 'db_time_ms': 250},
+    'BUDGETS': {},
+}
+
+
+def instrumentation_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'QUERY_INSTRUMENTATION', {})}
+
+
+def get_budget(url_name, method='GET'):
+    """
+    The query budget for a view: a 'POST view_name' entry over the view's
+    own entry over the default one. Writes usually cost more than reads.
+    """
+    config = instrumentation_settings()
+    budgets = config['BUDGETS']
+    return {**config['DEFAULT_BUDGET'], **budgets.get(url_name, {}), **budgets.get(f'{method} {url_name}', {})}
+
+
+class QueryStats:
+    """Queries run while handling one request, collected by execute_wrapper()."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.total_ms += elapsed
+            if elapsed >= self.slowest_ms:
+                self.slowest_ms = elapsed
+                self.slowest_sql = sql
+
+    def over_budget(self, budget):
+        return self.count > budget['queries'] or self.total_ms > budget['db_time_ms']
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;desc="{self.count} queries";dur={self.total_ms:.2f}',
+            f'db-slowest;dur={self.slowest_ms:.2f}',
+        ])
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Counts the queries and database time of each request.
+
+    The numbers go out in a Server-Timing header (visible in the browser's
+    network panel) and are kept on `response.query_stats` for tests. Requests
+    over their QUERY_INSTRUMENTATION budget are logged with the slowest SQL;
+    the SQL itself never goes into a response header.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _instrument(stack, stats):
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(stats))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        stats = QueryStats()
+        with ExitStack() as stack:
+            self._instrument(stack, stats)
+            response = self.get_response(request)
+        return self.report(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        stack = ExitStack()
+        # Async views run their queries through sync_to_async on the request's
+        # worker thread, which has its own connections; wrap those
+        await sync_to_async(self._instrument)(stack, stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.report(request, response, stats)
+
+    def report(self, request, response, stats):
+        config = instrumentation_settings()
+        response.query_stats = stats
+        if config['SERVER_TIMING']:
+            timing = stats.server_timing()
+            if response.has_header('Server-Timing'):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response['Server-Timing'] = timing
+
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        if config['LOG_OVER_BUDGET'] and stats.over_budget(get_budget(url_name, request.method)):
+            logger.warning(
+                '%s %s (%s) ran %d queries in %.1f ms; slowest %.1f ms: %s',
+                request.method, request.path, url_name, stats.count, stats.total_ms,
+                stats.slowest_ms, stats.slowest_sql,
+            )
+        return response
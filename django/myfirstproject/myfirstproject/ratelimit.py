@@ -0,0 +1,146 @@
+"""
+Token-bucket rate limiting for views that write.
+
+Every client gets a bucket per limit: one keyed on its IP address and,
+when the form has one, one keyed on the email address it submits. A bucket
+holds up to N tokens and refills at N per period; each request spends one
+token from each of its buckets, and a request that finds any bucket empty
+is refused with a 429 and a Retry-After header. So '5/m' allows a burst of
+five, then one more every twelve seconds.
+
+A check is one get_many() and one set_many() on the cache, whatever the
+traffic. Buckets live in the cache named by ALIAS; with the default
+per-process LocMemCache each worker counts on its own, so point CACHES at
+Memcached or Redis to enforce one limit across workers. The read and the
+write are not atomic, so concurrent requests can overspend a bucket by a
+token or two; that is fine for keeping bots off the SQLite writer.
+
+Limits are set per view in RATE_LIMITS['LIMITS'], see DEFAULT_SETTINGS.
+"""
+import hashlib
+import logging
+import math
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    # Where the client's address is. Behind a proxy that sets X-Real-IP,
+    # use 'HTTP_X_REAL_IP'; never a header clients can set themselves.
+    'IP_META_KEY': 'REMOTE_ADDR',
+    # scope -> {bucket kind -> 'count/period'}; kinds are 'ip' and 'email'
+    'LIMITS': {
+        'comment': {'ip': '5/m', 'email': '3/m'},
+        'contact': {'ip': '3/m', 'email': '5/h'},
+    },
+}
+
+RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+KEY_PREFIX = 'ratelimit'
+
+
+def rate_limit_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'RATE_LIMITS', {})}
+
+
+def parse_rate(rate):
+    """'5/m' or '10/15m' as (capacity, tokens added per second)."""
+    match = RATE_RE.match(rate.replace(' ', ''))
+    if not match:
+        raise ValueError(f'Invalid rate {rate!r}; expected e.g. "5/m" or "10/15m".')
+    count, multiplier, unit = match.groups()
+    seconds = int(multiplier or 1) * PERIODS[unit]
+    return int(count), int(count) / seconds
+
+
+def client_ip(request, config):
+    return request.META.get(config['IP_META_KEY'], '').split(',')[0].strip()
+
+
+def submitted_email(request):
+    return request.POST.get('email', '').strip().lower()
+
+
+def bucket_key(scope, kind, value):
+    # Hashed so any address makes a valid memcached key
+    digest = hashlib.blake2b(value.encode(), digest_size=16).hexdigest()
+    return f'{KEY_PREFIX}:{scope}:{kind}:{digest}'
+
+
+def take_token(cache, buckets, now=None):
+    """
+    Spend a token from each of `buckets` ({key: (capacity, rate)}) if all of
+    them have one. Return 0 on success, otherwise the seconds until they
+    will; nothing is spent then.
+    """
+    now = time.time() if now is None else now
+    states = cache.get_many(list(buckets))
+    updated = {}
+    retry_after = 0
+    for key, (capacity, rate) in buckets.items():
+        tokens, stamp = states.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - stamp) * rate)
+        if tokens < 1:
+            retry_after = max(retry_after, (1 - tokens) / rate)
+        updated[key] = (tokens - 1, now)
+    if retry_after:
+        return retry_after
+    # A bucket untouched for capacity / rate seconds is full again, the
+    # same as a missing one
+    timeout = max(math.ceil(capacity / rate) for capacity, rate in buckets.values())
+    cache.set_many(updated, timeout)
+    return 0
+
+
+def check(request, scope):
+    """Seconds the client must wait before `scope` accepts it again; 0 if allowed now."""
+    config = rate_limit_settings()
+    limits = config['LIMITS'].get(scope)
+    if not config['ENABLED'] or not limits:
+        return 0
+
+    identities = {'ip': client_ip(request, config), 'email': submitted_email(request)}
+    buckets = {
+        bucket_key(scope, kind, identities[kind]): parse_rate(rate)
+        for kind, rate in limits.items()
+        if identities.get(kind)
+    }
+    if not buckets:
+        return 0
+    return take_token(caches[config['ALIAS']], buckets)
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Too many requests. Please wait a moment and try again.\n',
+        status=429, content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+def rate_limit(scope, methods=('POST',)):
+    """
+    Limit a view's `methods` requests with the buckets configured for
+    `scope` in RATE_LIMITS['LIMITS']. Other methods pass straight through.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                retry_after = check(request, scope)
+                if retry_after:
+                    logger.warning('Rate limit %r hit by %s', scope, client_ip(request, rate_limit_settings()))
+                    return too_many_requests(retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,118 @@
+"""
+Database routing between the primary and read replicas.
+
+Writes go to 'default'. Reads of blog models go to a randomly chosen
+replica listed in settings.DATABASE_REPLICAS only where replica reads have
+been allowed: ReplicaPinningMiddleware allows them for safe requests, and
+everything else (management commands, background threads, migrations)
+reads from the primary, since it may act on what it reads. Reads inside
+a transaction on the primary stay there too.
+
+A client that has just written is pinned to the primary for
+REPLICA_PIN_SECONDS, so it reads its own writes even if the replicas lag
+behind.
+"""
+import contextvars
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+# True while handling a request that may read slightly stale data
+_replica_ok = contextvars.ContextVar('replica_reads_allowed', default=False)
+
+PIN_COOKIE = 'db_pin'
+
+
+def allow_replica_reads():
+    return _replica_ok.set(True)
+
+
+def reset_replica_reads(token):
+    _replica_ok.reset(token)
+
+
+def replica_reads_allowed():
+    return _replica_ok.get()
+
+
+class PrimaryReplicaRouter:
+    route_app_labels = {'blog'}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels or not replica_reads_allowed():
+            return None
+        # A transaction reads what it (or the rows it locked) wrote
+        if connections['default'].in_atomic_block:
+            return None
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema by copying the primary
+        return db not in getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReplicaPinningMiddleware:
+    """
+    Let safe requests read from replicas, except right after a write from
+    the same client.
+
+    Unsafe requests (POST, PUT, ...) always use the primary and set a short
+    lived cookie; requests carrying that cookie keep using the primary until
+    it expires. A cookie rather than the session avoids a session lookup on
+    every read.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        pinned, unsafe = self.should_pin(request)
+        token = None if pinned else allow_replica_reads()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                reset_replica_reads(token)
+        return self.set_pin_cookie(response, unsafe)
+
+    async def __acall__(self, request):
+        # sync_to_async copies the context, so ORM calls made from async
+        # views see the opt-in too
+        pinned, unsafe = self.should_pin(request)
+        token = None if pinned else allow_replica_reads()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                reset_replica_reads(token)
+        return self.set_pin_cookie(response, unsafe)
+
+    def should_pin(self, request):
+        unsafe = request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+        return unsafe or PIN_COOKIE in request.COOKIES, unsafe
+
+    def set_pin_cookie(self, response, unsafe):
+        if unsafe and getattr(settings, 'DATABASE_REPLICAS', []):
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 import os
 
+from .sqlite import CONNECTION_PRAGMAS, PRODUCTION_PRAGMAS, sqlite_options
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,7 +44,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so it sees the queries made by every middleware below it
+    'myfirstproject.middleware.QueryInstrumentationMiddleware',
+    'myfirstproject.routers.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # ETag from the body plus 304s for responses the page cache doesn't
+    # answer early (blog.cache), e.g. get_post_detail
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -75,13 +83,52 @@ WSGI_APPLICATION = 'myfirstproject.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite connection profile applied to every new connection, see
+# myfirstproject/sqlite.py for what each PRAGMA does. SQLITE_PROFILE=production
+# switches the database file to WAL mode, which is written into the file, so
+# it is opt-in; by default only per-connection PRAGMAs are set. Set to {} for
+# SQLite's defaults.
+if os.environ.get('SQLITE_PROFILE') == 'production':
+    SQLITE_PRAGMAS = PRODUCTION_PRAGMAS
+else:
+    SQLITE_PRAGMAS = CONNECTION_PRAGMAS
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': sqlite_options(SQLITE_PRAGMAS),
+        # Keep connections open between requests instead of reconnecting
+        # (and re-running the PRAGMAs) every time
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read replicas
+# Blog reads made by safe requests are spread over the replicas; writes, and
+# reads from commands and background threads, go to 'default'
+# (myfirstproject.routers). List replica SQLite files, comma separated, in
+# BLOG_DB_REPLICAS and fill them with `python manage.py sync_sqlite_replicas`.
+DATABASE_REPLICAS = []
+for number, path in enumerate(filter(None, os.environ.get('BLOG_DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'OPTIONS': sqlite_options({**SQLITE_PRAGMAS, 'query_only': 1}, transaction_mode=None),
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        # Tests run against one database; replicas just point at it
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['myfirstproject.routers.PrimaryReplicaRouter']
+
+# After a write, the client reads from the primary for this many seconds
+REPLICA_PIN_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -124,9 +171,146 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static')
 ]
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# collectstatic hashes, minifies and precompresses (.gz/.br) the files it
+# collects; myfirstproject.staticfiles serves them by Accept-Encoding
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'myfirstproject.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
+
+STATIC_SERVING = {
+    'MAX_AGE': 3600,
+}
+
+# Load Bootstrap, Font Awesome and the Inter font from static/vendor/ instead
+# of their CDNs. Fetch them first with `python manage.py vendor_assets`.
+STATIC_VENDOR_ASSETS = os.environ.get('STATIC_VENDOR_ASSETS') == '1'
+
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# How myfirstproject.media serves uploads. Behind nginx, use 'x-accel' and an
+# internal location aliasing MEDIA_ROOT at X_ACCEL_PREFIX so nginx sends the
+# bytes; Django still checks the path and answers conditional requests.
+MEDIA_SERVING = {
+    'MODE': os.environ.get('MEDIA_SERVING_MODE', 'python'),
+    'X_ACCEL_PREFIX': '/protected-media/',
+    'MAX_AGE': 3600,
+}
+
+# Token buckets for views that write (myfirstproject.ratelimit). Each POST
+# spends a token per bucket; an empty bucket means a 429.
+RATE_LIMITS = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'LIMITS': {
+        'comment': {'ip': '5/m', 'email': '3/m'},
+        'contact': {'ip': '3/m', 'email': '5/h'},
+    },
+}
+
+# Cache
+# LocMemCache is per process. With several workers use a shared backend such as
+# Memcached or Redis so page cache invalidations reach every worker.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'myfirstproject',
+    }
+}
+
+# Page cache for post_list and post_detail (blog.cache)
+BLOG_PAGE_CACHE = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+# Per-card fragment cache on post_list ({% post_card %} in blog_tags)
+BLOG_FRAGMENT_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 3600,
+}
+
+# Processes that resize uploaded images off the request path (blog.workers)
+BLOG_IMAGE_WORKERS = 2
+
+# Post thumbnails, cut from the featured image after the post is saved
+# (blog.thumbnails). Cards show a placeholder until then.
+BLOG_THUMBNAILS = {
+    'SIZE': (400, 200),
+}
+
+# Resized JPEG/WebP copies of featured images for srcset ({% responsive_image %},
+# blog.variants). Generated on first view; the original is shown until then.
+BLOG_IMAGE_VARIANTS = {
+    'WIDTHS': (320, 640, 960, 1280, 1920),
+    'ALIAS': 'default',
+}
+
+# Files of deleted posts and replaced images are deleted after commit by a
+# background thread (blog.media_cleanup); `manage.py sweep_media` removes any
+# orphans it missed.
+BLOG_MEDIA_CLEANUP = {
+    'ENABLED': True,
+}
+
+# Serve post_list, post_detail and the JSON read endpoints from the async
+# views in blog.async_views. Only worth it under ASGI (myfirstproject.asgi).
+BLOG_ASYNC_VIEWS = os.environ.get('BLOG_ASYNC_VIEWS', '') == '1'
+
+# Blog pagination
+# post_list uses keyset (cursor) pagination; clients may ask for a smaller or
+# larger page with ?page_size= up to the maximum below.
+BLOG_POSTS_PAGE_SIZE = 12
+BLOG_POSTS_MAX_PAGE_SIZE = 100
+
+# Comments shown inline on post_detail; the rest load from the JSON endpoint.
+BLOG_COMMENTS_PAGE_SIZE = 20
+
+# Repeated comments (blog.duplicates): the same email may not post the same or
+# a near-identical comment on a post twice within WINDOW seconds, and one text
+# may appear at most FLOOD_LIMIT times site-wide in that window.
+BLOG_COMMENT_DUPLICATES = {
+    'ENABLED': True,
+    'WINDOW': 600,
+    'MAX_DISTANCE': 3,
+    'FLOOD_LIMIT': 3,
+}
+
+# Sample posts kept in a JSON file (blog.post_store, views.load_posts). It is
+# parsed once and re-read when it changes; files above the size below are
+# parsed one post at a time.
+BLOG_POSTS_JSON = BASE_DIR / 'data' / 'posts.json'
+BLOG_POSTS_JSON_STREAMING_BYTES = 32 * 1024 * 1024
+
+# Rows fetched per query by the streaming export (/blog/api/posts/stream/)
+BLOG_EXPORT_BATCH_SIZE = 1000
+
+# Per-request SQL instrumentation (myfirstproject.middleware)
+# Every response gets a Server-Timing header with its query count and db time.
+# Requests over budget are logged to 'myfirstproject.queries' with the slowest
+# SQL. BUDGETS are keyed by URL name, or 'METHOD url_name' for one method, and
+# override DEFAULT_BUDGET.
+QUERY_INSTRUMENTATION = {
+    'SERVER_TIMING': True,
+    'LOG_OVER_BUDGET': True,
+    'DEFAULT_BUDGET': {'queries': 20, 'db_time_ms': 250},
+    'BUDGETS': {
+        'post_list': {'queries': 2},
+        'post_detail': {'queries': 4},
+        # Post, two duplicate checks (blog.duplicates), INSERT, comment_count
+        'POST post_detail': {'queries': 5},
+        'post_update_form': {'queries': 3},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
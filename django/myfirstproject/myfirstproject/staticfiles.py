@@ -0,0 +1,244 @@
+"""
+Static files: build step and serving.
+
+`collectstatic` with CompressedManifestStaticFilesStorage (the
+'staticfiles' entry of STORAGES) copies everything to STATIC_ROOT, then:
+
+- names each file after a hash of its content (css/style.a1b2c3.css) and
+  records the mapping in staticfiles.json, so {% static %} URLs change
+  whenever the file does and browsers may cache them for a year;
+- minifies the CSS and JS from STATICFILES_DIRS, hashing the minified
+  bytes so a change to a minifier changes the URL too;
+- writes .gz and, when the brotli package is installed, .br siblings of
+  text files, compressed once here rather than on every request.
+
+serve() answers STATIC_URL: it sends the .br or .gz sibling when the
+client's Accept-Encoding allows it, with Vary: Accept-Encoding, and marks
+hashed names immutable. nginx can do the same from STATIC_ROOT with
+`gzip_static on; brotli_static on;`.
+
+VENDOR_ASSETS are the third-party files layout.html used to fetch from
+CDNs. `manage.py vendor_assets` downloads them into static/vendor/ and
+STATIC_VENDOR_ASSETS = True makes {% vendor_asset %} point there.
+"""
+import gzip
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from .media import make_etag
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_SETTINGS = {
+    # Unhashed names (files not referenced through {% static %}) revalidate
+    # after this many seconds; hashed ones are cached for a year
+    'MAX_AGE': 3600,
+}
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.xml', '.map')
+# Below this, compression saves less than the cost of the extra header
+MIN_COMPRESS_SIZE = 256
+
+# name under static/vendor/ -> CDN URL it replaces
+VENDOR_ASSETS = {
+    'bootstrap/bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'bootstrap/bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    'fontawesome/all.min.css': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css',
+    'inter/inter.css': 'https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap',
+}
+
+CSS_TOKEN_RE = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*(?!!).*?\*/''', re.S)
+
+
+def static_serving_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'STATIC_SERVING', {})}
+
+
+def minify_css(text):
+    """
+    Drop comments (except /*! licence */ ones) and the whitespace around
+    braces, semicolons, commas and after colons. Strings are left alone.
+    """
+    parts = []
+    position = 0
+    for match in CSS_TOKEN_RE.finditer(text):
+        parts.append(_squeeze_css(text[position:match.start()]))
+        if match.group(1):
+            parts.append(match.group(1))
+        position = match.end()
+    parts.append(_squeeze_css(text[position:]))
+    return ''.join(parts).replace(';}', '}').strip()
+
+
+def _squeeze_css(text):
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,])\s*', r'\1', text)
+    return re.sub(r':\s+', ':', text)
+
+
+def minify_js(text):
+    """
+    Drop trailing whitespace and blank lines, nothing more. Comments and
+    indentation stay: telling them apart from the inside of a string,
+    template literal or regex needs a real JavaScript parser. A template
+    literal that relies on trailing spaces or blank lines must spell them
+    with escapes.
+    """
+    lines = [line.rstrip() for line in text.splitlines()]
+    return '\n'.join(line for line in lines if line) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def compress(path):
+    """Write .gz (and .br) siblings of `path` where they come out smaller."""
+    with open(path, 'rb') as handle:
+        data = handle.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return
+    encoders = [('.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append(('.br', lambda raw: brotli.compress(raw, quality=11)))
+    for suffix, encode in encoders:
+        compressed = encode(data)
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as handle:
+                handle.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage that also minifies and precompresses."""
+
+    # Names post_process() minifies; file_hash() hashes them minified
+    minified_names = frozenset()
+
+    def minifier(self, name):
+        # Vendored *.min.* files are minified already
+        if name in self.minified_names and '.min.' not in name:
+            return MINIFIERS.get(os.path.splitext(name)[1])
+        return None
+
+    def file_hash(self, name, content=None):
+        minify = self.minifier(name)
+        if content is None or minify is None:
+            return super().file_hash(name, content)
+        text = b''.join(content.chunks()).decode()
+        return super().file_hash(name, ContentFile(minify(text).encode()))
+
+    def post_process(self, paths, dry_run=False, **options):
+        # Only the project's own files; apps ship theirs ready to serve
+        project_dirs = {
+            os.path.abspath(root[1] if isinstance(root, (list, tuple)) else root)
+            for root in settings.STATICFILES_DIRS
+        }
+        self.minified_names = frozenset(
+            name for name, (storage, _) in paths.items()
+            if os.path.abspath(getattr(storage, 'location', '')) in project_dirs
+        )
+        hashed_names = {}
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names[name] = hashed_name
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+
+        for name, hashed_name in hashed_names.items():
+            extension = os.path.splitext(name)[1]
+            minify = self.minifier(name)
+            if minify:
+                with self.open(hashed_name) as handle:
+                    text = handle.read().decode()
+                self.delete(hashed_name)
+                self._save(hashed_name, ContentFile(minify(text).encode()))
+            if extension in COMPRESSIBLE_EXTENSIONS:
+                compress(self.path(hashed_name))
+
+    def stored_name(self, name):
+        # Before the first collectstatic (development, tests) there is no
+        # manifest: fall back to the plain name rather than fail every page
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+
+def accepted_encodings(header):
+    """The content codings a request's Accept-Encoding allows (q > 0)."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        match = re.search(r'q=([\d.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                continue
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _is_hashed(name):
+    return name in getattr(staticfiles_storage, 'hashed_files', {}).values()
+
+
+@require_safe
+def serve(request, path):
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+        file_stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, TypeError, ValueError):
+        raise Http404('No such file.')
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404('No such file.')
+    # Precompressed siblings are only sent through Accept-Encoding, with
+    # the Content-Encoding that makes browsers decode them
+    if full_path.endswith(('.gz', '.br')) and os.path.isfile(full_path[:-3]):
+        raise Http404('No such file.')
+
+    name = os.path.relpath(full_path, settings.STATIC_ROOT).replace(os.sep, '/')
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    send_path, encoding = full_path, None
+    accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    for coding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if coding in accepted and os.path.isfile(full_path + suffix):
+            send_path, encoding = full_path + suffix, coding
+            file_stat = os.stat(send_path)
+            break
+
+    # Each encoding is a different representation, with its own ETag
+    etag = make_etag(file_stat)
+    last_modified = int(file_stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = FileResponse(
+            open(send_path, 'rb'), content_type=content_type, filename=os.path.basename(full_path),
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if _is_hashed(name):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = f"public, max-age={static_serving_settings()['MAX_AGE']}"
+    if name.endswith(COMPRESSIBLE_EXTENSIONS):
+        patch_vary_headers(response, ['Accept-Encoding'])
+    return response
@@ -0,0 +1,25 @@
+"""
+Test helpers shared by the project's apps.
+"""
+from .middleware import get_budget
+
+
+class QueryBudgetMixin:
+    """
+    Mix into a TestCase to check responses against QUERY_INSTRUMENTATION.
+
+    QueryInstrumentationMiddleware attaches its counts to every response,
+    so this checks the request exactly as production would measure it.
+    """
+
+    def assertWithinQueryBudget(self, response, url_name=None):
+        stats = getattr(response, 'query_stats', None)
+        if stats is None:
+            self.fail('Response has no query_stats; is QueryInstrumentationMiddleware enabled?')
+
+        url_name = url_name or response.resolver_match.url_name
+        budget = get_budget(url_name, response.wsgi_request.method)
+        self.assertLessEqual(
+            stats.count, budget['queries'],
+            f'{url_name} ran {stats.count} queries, budget is {budget["queries"]}',
+        )
@@ -14,10 +14,11 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path, include
-from . import views
-from django.conf.urls.static import static
+from django.urls import path, include, re_path
+from . import media, staticfiles, views
 from django.conf import settings
 
 urlpatterns = [
@@ -30,5 +31,13 @@ urlpatterns = [
     path('blog/', include('blog.urls'))
 ]
 
+# Uploads, with ETags, Range support and optional X-Accel-Redirect (see media.py)
+urlpatterns += [
+    re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.+)$', media.serve, name='media'),
+]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Collected static files, precompressed and hashed (see staticfiles.py). Under
+# runserver with DEBUG on, the staticfiles app answers these URLs first.
+urlpatterns += [
+    re_path(rf'^{re.escape(settings.STATIC_URL.lstrip("/"))}(?P<path>.+)$', staticfiles.serve, name='static'),
+]
@@ -4,6 +4,8 @@ import random
 import string
 from django.contrib import messages
 
+from .ratelimit import rate_limit
+
 def homepage(request):
 
     
@@ -23,6 +25,7 @@ def generate_refrence_number():
     return ''.join(random.choice(chars) for _ in range(10)) # 10 characters
 
 
+@rate_limit('contact')
 def contact(request):
     if request.method == 'POST':
         form = ContactForm(request.POST)
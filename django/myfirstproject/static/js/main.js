@@ -37,3 +37,57 @@ document.addEventListener('DOMContentLoaded', function() {
     }   
 
 );
+
+
+// Load further pages of comments on the post detail page
+document.addEventListener('DOMContentLoaded', function() {
+    const button = document.getElementById('load-more-comments');
+    const list = document.querySelector('.comment-list');
+
+    if (!button || !list) {
+        return;
+    }
+
+    function buildComment(comment) {
+        const card = document.createElement('div');
+        card.className = 'card mb-3';
+        card.innerHTML = `
+            <div class="card-body">
+                <div class="d-flex align-items-center mb-2">
+                    <div class="comment-avatar rounded-circle bg-light d-flex align-items-center justify-content-center me-3" style="width: 50px; height: 50px;">
+                        <i class="fas fa-user text-secondary"></i>
+                    </div>
+                    <div>
+                        <h5 class="card-title mb-0"></h5>
+                        <small class="text-muted"></small>
+                    </div>
+                </div>
+                <p class="card-text"></p>
+            </div>`;
+        // textContent keeps user-supplied text from being parsed as HTML
+        card.querySelector('.card-title').textContent = comment.name;
+        card.querySelector('small').textContent = comment.created_display;
+        card.querySelector('.card-text').textContent = comment.content;
+        return card;
+    }
+
+    button.addEventListener('click', function() {
+        button.disabled = true;
+        const url = `${button.dataset.url}?cursor=${encodeURIComponent(button.dataset.cursor)}`;
+
+        fetch(url, { headers: { 'Accept': 'application/json' } })
+            .then(response => response.json())
+            .then(data => {
+                data.comments.forEach(comment => list.appendChild(buildComment(comment)));
+                if (data.next_cursor) {
+                    button.dataset.cursor = data.next_cursor;
+                    button.disabled = false;
+                } else {
+                    button.parentElement.remove();
+                }
+            })
+            .catch(() => {
+                button.disabled = false;
+            });
+    });
+});